@@ -0,0 +1,199 @@
+"""
+Command line batch processor for schedule files.
+
+Each schedule file is loaded into a ProjectNetwork, calculated, and reported as one line of
+JSON on stdout as soon as it finishes. Files can be processed in parallel with --jobs.
+
+Schedule files are either JSON or CSV. A JSON schedule is a list of activities, or an object
+with an "activities" list; each activity has a "label", a "duration" and optionally
+"successors" (comma-separated string or list) and a "dbkey". A CSV schedule has the
+columns label,duration,successors[,dbkey] with successors separated by commas or semicolons.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from cpm_calculator.cpm import ProjectNetwork, Node
+
+SCHEDULE_EXTENSIONS = (".json", ".csv")
+
+
+def read_activities(path):
+    """
+    Read the activity records from a JSON or CSV schedule file
+
+    Parameters:
+    path    - path to the schedule file
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            activities = []
+            for row in csv.DictReader(f):
+                successors = (row.get("successors") or "").replace(";", ",")
+                activities.append({
+                    "label": row["label"],
+                    "duration": float(row["duration"]) if "." in row["duration"] else int(row["duration"]),
+                    "successors": successors,
+                    "dbkey": row.get("dbkey") or None,
+                })
+            return activities
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("activities", [])
+    return data
+
+
+def build_network(activities):
+    """
+    Build a ProjectNetwork (with dummy start and finish nodes) from a list of activity records
+
+    Parameters:
+    activities  - list of dicts with "label", "duration" and optional "successors" and "dbkey"
+    """
+    network = ProjectNetwork()
+    for activity in activities:
+        node = Node(node_type="step", label=str(activity["label"]), duration=activity["duration"])
+        node.set_dbkey(activity.get("dbkey"))
+        network.add_node(node)
+    for activity in activities:
+        successors = activity.get("successors") or []
+        if isinstance(successors, str):
+            successors = successors.split(",")
+        predecessor = network.get_node(str(activity["label"]))
+        for label in successors:
+            label = str(label).strip()
+            if not label:
+                continue
+            successor = network.get_node(label)
+            if successor is None:
+                raise ValueError("Activity {} has unknown successor {}".format(predecessor.get_label(), label))
+            network.link(predecessor, successor)
+    network.set_dummy_start_node()
+    network.set_dummy_finish_node()
+    return network
+
+
+def _format_date(value):
+    return value.isoformat() if value is not None else None
+
+
+def process_file(path, start_date=None, finish_date=None, workdays=False):
+    """
+    Calculate a single schedule file and return its result as a JSON-serialisable dict
+
+    Parameters:
+    path        - path to the schedule file
+    start_date  - optional date the project starts; used to calculate activity dates
+    finish_date - optional date the project must finish; ignored if start_date is given
+    workdays    - count working days only when calculating dates
+    """
+    network = build_network(read_activities(path))
+    network.calculate()
+    if start_date is not None:
+        network.update_dates_with_earliest_start(start_date, workdays)
+    elif finish_date is not None:
+        network.update_dates_with_latest_finish(finish_date, workdays)
+
+    snapshot = network.get_snapshot()
+    activities = {}
+    for result in snapshot.get_node_list():
+        if result.label in ("dummy start", "dummy finish"):
+            continue
+        activities[result.label] = {
+            "es": result.earliest_start,
+            "ef": result.earliest_finish,
+            "ls": result.latest_start,
+            "lf": result.latest_finish,
+            "float": result.float,
+            "critical": result.iscritical,
+            "es_date": _format_date(result.earliest_start_date),
+            "ef_date": _format_date(result.earliest_finish_date),
+            "ls_date": _format_date(result.latest_start_date),
+            "lf_date": _format_date(result.latest_finish_date),
+        }
+    finish = snapshot.get_node("dummy finish")
+    start = snapshot.get_node("dummy start")
+    return {
+        "file": path,
+        "critical_path": [label for label in snapshot.get_critical_path()
+                          if label not in ("dummy start", "dummy finish")],
+        "duration": snapshot.get_cp_duration(),
+        "start_date": _format_date(start.earliest_start_date),
+        "finish_date": _format_date(finish.latest_finish_date),
+        "activities": activities,
+    }
+
+
+def _process_file_safe(path, start_date, finish_date, workdays):
+    try:
+        return process_file(path, start_date, finish_date, workdays)
+    except Exception as e:
+        return {"file": path, "error": "{}: {}".format(type(e).__name__, e)}
+
+
+def find_schedules(paths):
+    """
+    Expand the command line arguments (files, directories or glob patterns) into schedule files
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(SCHEDULE_EXTENSIONS)
+            ))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    return files
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="cpm-calc",
+        description="Calculate the critical path of schedule files and print one JSON line per file.",
+    )
+    parser.add_argument("paths", nargs="+", help="schedule files, directories or glob patterns")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes (default 1)")
+    dates = parser.add_mutually_exclusive_group()
+    dates.add_argument("--start-date", type=_parse_date, help="project start date (YYYY-MM-DD)")
+    dates.add_argument("--finish-date", type=_parse_date, help="project finish date (YYYY-MM-DD)")
+    parser.add_argument("--workdays", action="store_true", help="count working days only when calculating dates")
+    args = parser.parse_args(argv)
+
+    files = find_schedules(args.paths)
+    failures = 0
+
+    def emit(result):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+        return "error" in result
+
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = [
+                executor.submit(_process_file_safe, path, args.start_date, args.finish_date, args.workdays)
+                for path in files
+            ]
+            for future in as_completed(futures):
+                failures += emit(future.result())
+    else:
+        for path in files:
+            failures += emit(_process_file_safe(path, args.start_date, args.finish_date, args.workdays))
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,22 @@
+import heapq
+import threading
+from collections import deque, namedtuple
 from datetime import datetime, date, timedelta
+from types import MappingProxyType
 from workdays import workday
 
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the bulk accessors
+    np = None
+
 #TODO: Check for / Prevent loops
 #TODO: Check - a node cannot succeed or precede itself
 #TODO: Check a node by type?
 
+DUMMY_LABELS = ("dummy start", "dummy finish")
+
+
 class ProjectNetwork(object):
     """
     Contains a collection of Nodes i.e.
@@ -15,10 +27,17 @@ class ProjectNetwork(object):
     """
     def __init__(self):
         self.nodes = {}
+        self.dbkeys = {}            # dbkey: node
+        self.node_ids = {}          # label: int id, stable for the life of the network
+        self.id_nodes = []          # nodes indexed by id
         self.latest_start = date.today()
         self.latest_finish = date.today()
         self.start_node = None
         self.finish_node = None
+        self.snapshot = None        # NetworkSnapshot, replaced (never mutated) after each calculation
+        self.revision = 0           # int, incremented whenever nodes, links or durations change
+        self.summary_nodes = []     # SummaryNode objects in this network
+        self._calc_lock = threading.Lock()  # serialises writers only; readers use the snapshot
 
     def add_node(self, node):
         """
@@ -28,7 +47,24 @@ class ProjectNetwork(object):
         node    - a node object
         """
         #if not node.get_label() in self.nodes.keys(): # prevent from adding a node twice
-        self.nodes.update({node.get_label(): node})
+        self.revision += 1
+        node.network = self
+        if isinstance(node, SummaryNode) and node not in self.summary_nodes:
+            self.summary_nodes.append(node)
+        label = node.get_label()
+        replaced = self.nodes.get(label)
+        self.nodes.update({label: node})
+        if replaced is not None and replaced is not node and isinstance(replaced, SummaryNode):
+            self.summary_nodes.remove(replaced)
+        if replaced is None:
+            self.node_ids[label] = len(self.id_nodes)
+            self.id_nodes.append(node)
+        else:
+            self.id_nodes[self.node_ids[label]] = node
+            if replaced.get_dbkey() is not None and self.dbkeys.get(replaced.get_dbkey()) is replaced:
+                del self.dbkeys[replaced.get_dbkey()]
+        if node.get_dbkey() is not None:
+            self.dbkeys[node.get_dbkey()] = node
 
         if node.get_node_type() == "start":
             self.start_node = node
@@ -46,50 +82,84 @@ class ProjectNetwork(object):
         driving date        - either the date the project is due to start, or when it must finish
                             i.e. latest start OR latest/must finish
         driving_date_type   - "start" or "finish"
-        """
-        self._forward_pass(self.get_start_node())
-        self.get_finish_node().set_latest_finish(self.get_finish_node().get_earliest_finish())
-        self._backward_pass(self.get_finish_node())
 
-
-    def _forward_pass(self, node, seq=1):
+        The live Node objects are updated in place; once both passes are complete an
+        immutable NetworkSnapshot of the results is published (see get_snapshot), and the
+        critical path and duration getters read from it. Activity dates are cleared until
+        one of the update_dates methods is called.
+        """
+        with self._calc_lock:
+            revision = self.revision
+            self._reset()
+            order = [self.get_node(label) for label in self.topological_order()]
+            self._forward_pass(order)
+            # every latest finish starts at the project finish and is pulled back by its successors
+            for node in order:
+                node.set_latest_finish(self.get_finish_node().get_earliest_finish())
+            self._backward_pass(order)
+            self._publish_snapshot(revision, [self.node_ids[node.get_label()] for node in order])
+
+    def _reset(self):
+        """
+        Clear the results of any previous calculation so that the network can be recalculated
+        after durations or links have changed. The start node keeps its earliest start.
+        """
+        for node in self.get_node_list():
+            if node is not self.get_start_node():
+                node.set_earliest_start(0)
+            node.set_earliest_finish(0)
+            node.set_latest_start(0)
+            node.set_latest_finish(0)
+            node.set_float(0)
+            node.set_iscritical(False)
+            node.set_sequence(0)
+            node.set_earliest_start_date(None)
+            node.set_earliest_finish_date(None)
+            node.set_latest_start_date(None)
+            node.set_latest_finish_date(None)
+
+    def _publish_snapshot(self, revision, order):
         """
-        Recursive routine that iterates through all node successors, beginning at the 'start' node,
-        and updates the early start and early finish durations (days) for each node in the project network
+        Build a NetworkSnapshot from the current node values and swap it in.
+        Assigning the attribute is atomic, so readers see either the old or the new snapshot.
+
+        Parameters:
+        revision    - the network revision the results were calculated from
+        order       - the node ids in the topological order used by the calculation
         """
-        # if there are no successors, then it's the last node
-        node.set_earliest_finish(node.get_earliest_start() + node.get_duration())
-        if node.get_sequence() == 0:
-            node.set_sequence(seq)
+        self.snapshot = NetworkSnapshot(self, revision, order)
 
-        successors = node.get_successor_list()
-        seq += 1
-        for successor in successors:
-            successor_node = self.get_node(successor)
-            successor_node.set_sequence(seq)
-            if node.get_earliest_finish() > successor_node.get_earliest_start():
-                successor_node.set_earliest_start(node.get_earliest_finish())
-            # successor_node.set_earliest_finish(node.get_earliest_finish() + successor_node.get_duration())
-            self._forward_pass(successor_node, seq)
-        
 
-    
-    def _backward_pass(self, node):
+    def _forward_pass(self, order):
         """
-        Recursive routine that iterates through all node predecessors, beginning at the 'finish' node,
+        Works through the nodes in topological order (every node after its predecessors) and
+        updates the early start and early finish durations (days) for each node in the project network
+        """
+        for node in order:
+            node.set_earliest_finish(node.get_earliest_start() + node.get_duration())
+            if node.get_sequence() == 0:
+                node.set_sequence(1)
+            seq = node.get_sequence() + 1
+            for successor in node.successors:
+                successor_node = self.get_node(successor)
+                if successor_node.get_sequence() < seq:
+                    successor_node.set_sequence(seq)
+                if node.get_earliest_finish() > successor_node.get_earliest_start():
+                    successor_node.set_earliest_start(node.get_earliest_finish())
+
+    def _backward_pass(self, order):
+        """
+        Works through the nodes in reverse topological order (every node after its successors)
         and updates the late start and late finish durations (days) for each node in the project network
         """
-        node.set_latest_start(node.get_latest_finish() - node.get_duration())
-        if node.get_earliest_finish() == node.get_latest_finish():
-            node.set_iscritical(True)
-        predecessors = node.get_predecessor_list()
-        for predecessor in predecessors:
-            predecessor_node = self.get_node(predecessor)
-            if  predecessor_node.get_latest_finish() == 0 or predecessor_node.get_latest_finish() > node.get_latest_start():
-                predecessor_node.set_latest_finish(node.get_latest_start())
-            #predecessor_node.set_latest_start(predecessor_node.get_latest_finish() - predecessor_node.get_duration())
-            self._backward_pass(predecessor_node)
-        
+        for node in reversed(order):
+            node.set_latest_start(node.get_latest_finish() - node.get_duration())
+            node.set_float(node.get_latest_start() - node.get_earliest_start())
+            node.set_iscritical(node.get_earliest_finish() == node.get_latest_finish())
+            for predecessor in node.predecessors:
+                predecessor_node = self.get_node(predecessor)
+                if predecessor_node.get_latest_finish() > node.get_latest_start():
+                    predecessor_node.set_latest_finish(node.get_latest_start())
 
     def link(self, predecessor, successor):
         """
@@ -125,11 +195,21 @@ class ProjectNetwork(object):
 
     def get_earliest_start_date(self, latest_finish_date, workdays=False):
         if workdays:
-            return (workday(latest_finish_date,(self.get_finish_node().get_latest_finish() * -1)))
+            return (workday(latest_finish_date,(self.get_cp_duration() * -1)))
         else:
-            return latest_finish_date - timedelta(self.get_finish_node().get_latest_finish())
+            return latest_finish_date - timedelta(self.get_cp_duration())
 
     def update_dates_with_earliest_start(self, earliest_start_date, workdays=False):
+        with self._calc_lock:
+            self._update_dates(earliest_start_date, workdays)
+            # dates don't change the calculated offsets, so keep the calculated revision
+            snapshot = self.get_snapshot()
+            if snapshot is None:
+                self._publish_snapshot(None, [self.node_ids[label] for label in self.topological_order()])
+            else:
+                self._publish_snapshot(snapshot.get_revision(), snapshot.get_order())
+
+    def _update_dates(self, earliest_start_date, workdays=False):
         for node in self.get_node_list():
             if workdays:
                 node.set_earliest_start_date(workday(earliest_start_date, node.get_earliest_start()))
@@ -148,13 +228,361 @@ class ProjectNetwork(object):
         self.update_dates_with_earliest_start(ealiest_start_date, workdays)
 
     def get_critical_path(self):
+        """
+        Return the critical node labels from the last published calculation
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            return snapshot.get_critical_path()
+        return self._critical_path()
+
+    def get_cp_duration(self):
+        """
+        Return the critical path duration from the last published calculation
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            return snapshot.get_cp_duration()
+        return self._cp_duration()
+
+    def _critical_path(self):
+        # read from the live nodes; only safe while holding the calculation lock
         nodes = [node for node in self.get_node_list() if node.is_critical()]
         nodes = sorted(nodes, key = lambda node: node.get_sequence())
         return [node.get_label() for node in nodes]
 
-    def get_cp_duration(self):
+    def _cp_duration(self):
         return self.get_finish_node().get_latest_finish()
 
+    def sensitivity(self, delta=1):
+        """
+        Report how the critical path duration responds to a change in each activity's duration.
+        Call after calculate(). Uses the float of each activity plus one sweep over the links of
+        the published snapshot in topological order, rather than recalculating the network once
+        per activity; like the other snapshot readers it takes no lock. Requires numpy.
+
+        Parameters:
+        delta   - the change in duration (days) to evaluate, applied as +delta and -delta
+
+        Returns a dict of label: Sensitivity where
+        increase                - change in get_cp_duration() if the duration grows by delta
+        decrease                - change in get_cp_duration() if the duration shrinks by delta
+                                (never below a duration of zero)
+        critical_threshold      - increase in duration at which the activity becomes critical
+                                (0 if already critical)
+        noncritical_threshold   - decrease in duration beyond which a critical activity is no
+                                longer critical (None if not critical, or if it stays critical
+                                even at zero duration)
+        """
+        if np is None:
+            raise ImportError("numpy is required for sensitivity")
+        snapshot = self.get_snapshot()
+        if self.is_modified():
+            raise ValueError("The network has changed since it was calculated; call calculate() first")
+        cp_duration = snapshot.get_cp_duration()
+        results = list(snapshot.get_node_list())    # indexed by node id
+        order = [results[node_id].label for node_id in snapshot.get_order()]
+        position = [0] * len(results)
+        for p, node_id in enumerate(snapshot.get_order()):
+            position[node_id] = p
+
+        # Any path that avoids the activity at position p must cross p along a link (a, b)
+        # with position(a) < p < position(b). The longest such path through (a, b) is
+        # EF(a) + (cp_duration - LS(b)), so sweeping the links by position(a) with a max-heap
+        # gives the longest path that avoids each activity.
+        predecessors, successors = snapshot.get_links()
+        links = sorted(
+            (position[a], position[b], results[a].earliest_finish + cp_duration - results[b].latest_start)
+            for a, b in zip(predecessors.tolist(), successors.tolist())
+        )
+
+        report = {}
+        heap = []
+        i = 0
+        for p, label in enumerate(order):
+            while i < len(links) and links[i][0] < p:
+                heapq.heappush(heap, (-links[i][2], links[i][1]))
+                i += 1
+            while heap and heap[0][1] <= p:
+                heapq.heappop(heap)
+            avoiding = -heap[0][0] if heap else None
+
+            result = snapshot.get_node(label)
+            shrink = min(delta, result.duration)
+            if result.iscritical:
+                if avoiding is None:
+                    decrease = -shrink
+                    noncritical_threshold = None
+                else:
+                    decrease = -min(shrink, cp_duration - avoiding)
+                    noncritical_threshold = cp_duration - avoiding
+                    if noncritical_threshold >= result.duration:
+                        noncritical_threshold = None
+                critical_threshold = 0
+            else:
+                decrease = 0
+                noncritical_threshold = None
+                critical_threshold = result.float
+            report[label] = Sensitivity(
+                label=label,
+                duration=result.duration,
+                float=result.float,
+                iscritical=result.iscritical,
+                increase=max(0, delta - result.float),
+                decrease=decrease,
+                critical_threshold=critical_threshold,
+                noncritical_threshold=noncritical_threshold,
+            )
+        return report
+
+    def topological_order(self):
+        """
+        Return the node labels in topological order (every node before its successors)
+        """
+        indegree = {label: len(node.predecessors) for label, node in self.nodes.items()}
+        queue = deque(label for label, count in indegree.items() if count == 0)
+        order = []
+        while queue:
+            label = queue.popleft()
+            order.append(label)
+            for successor in self.nodes[label].successors:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    queue.append(successor)
+        if len(order) != len(self.nodes):
+            raise ValueError("The project network contains a loop")
+        return order
+
+    def set_dbkey(self, node, dbkey):
+        """
+        Set a node's database key and keep the dbkey index up to date
+
+        Parameters:
+        node    - a node object in this network
+        dbkey   - any hashable value, should be unique
+        """
+        if node.get_dbkey() is not None and self.dbkeys.get(node.get_dbkey()) is node:
+            del self.dbkeys[node.get_dbkey()]
+        node.set_dbkey(dbkey)
+        if dbkey is not None:
+            self.dbkeys[dbkey] = node
+
+    def get_node_by_dbkey(self, dbkey):
+        return self.dbkeys.get(dbkey)
+
+    def get_node_by_id(self, node_id):
+        return self.id_nodes[node_id]
+
+    def get_node_id(self, label):
+        return self.node_ids.get(label)
+
+    def _lookup_nodes(self, keys, by):
+        """
+        Return the nodes for a sequence of ids, dbkeys or labels
+
+        Parameters:
+        keys    - sequence (or numpy array) of keys
+        by      - "id", "dbkey" or "label"
+        """
+        if np is not None and isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        if by == "id":
+            index = self.id_nodes
+        elif by == "dbkey":
+            index = self.dbkeys
+        elif by == "label":
+            index = self.nodes
+        else:
+            raise ValueError("by must be 'id', 'dbkey' or 'label', not {!r}".format(by))
+        try:
+            return [index[key] for key in keys]
+        except (KeyError, IndexError) as e:
+            raise KeyError("No node with {} {}".format(by, e.args[0] if isinstance(e, KeyError) else "in keys"))
+
+    def get_ids(self, keys, by="dbkey"):
+        """
+        Return a numpy array of the integer node ids for a sequence of dbkeys or labels
+        """
+        if np is None:
+            raise ImportError("numpy is required for bulk accessors")
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        if by == "label":
+            ids = self.node_ids
+            return np.fromiter((ids[key] for key in keys), dtype=np.int64, count=len(keys))
+        node_ids = self.node_ids
+        return np.fromiter((node_ids[node.label] for node in self._lookup_nodes(keys, by)),
+                           dtype=np.int64, count=len(keys))
+
+    def get_values(self, keys, fields=("earliest_start", "latest_finish"), by="id"):
+        """
+        Return results of the last calculation for many nodes at once as a numpy array.
+        Values are read from the id-indexed columns of the published snapshot, so ids are
+        used directly as array indexes; dbkeys and labels are first mapped with get_ids.
+
+        Parameters:
+        keys    - sequence (or numpy array) of node ids, dbkeys or labels
+        fields  - a column name (see NetworkSnapshot.COLUMNS) e.g. "latest_finish" (returns a
+                1-d array), or a sequence of names (returns an array with one row per key and
+                one column per field)
+        by      - "id", "dbkey" or "label"
+        """
+        if np is None:
+            raise ImportError("numpy is required for bulk accessors")
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            raise ValueError("The network has not been calculated")
+        ids = np.asarray(keys, dtype=np.int64) if by == "id" else self.get_ids(keys, by)
+        if isinstance(fields, str):
+            return snapshot.get_column(fields)[ids]
+        return np.column_stack([snapshot.get_column(field)[ids] for field in fields]).reshape(len(ids), len(fields))
+
+    def set_durations(self, keys, durations, by="dbkey"):
+        """
+        Set the duration of many nodes at once. Recalculate the network afterwards.
+
+        Parameters:
+        keys        - sequence (or numpy array) of node dbkeys, ids or labels
+        durations   - sequence (or numpy array) of durations, one per key
+        by          - "dbkey", "id" or "label"
+        """
+        nodes = self._lookup_nodes(keys, by)
+        if np is not None and isinstance(durations, np.ndarray):
+            durations = durations.tolist()
+        if len(nodes) != len(durations):
+            raise ValueError("{} keys but {} durations".format(len(nodes), len(durations)))
+        for node, duration in zip(nodes, durations):
+            node.set_duration(duration)
+        self.revision += 1
+
+    def mark_modified(self):
+        """
+        Record changes the network cannot see (e.g. a node's successor or predecessor sets
+        edited directly), so that summary nodes wrapping this network recalculate it.
+        Duration changes are recorded automatically.
+        """
+        self.revision += 1
+
+    def is_modified(self):
+        """
+        True if the network has changed since its last calculation, including changes inside
+        the subnetworks of its summary nodes
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is None or snapshot.get_revision() != self.revision:
+            return True
+        return any(node.get_subnetwork().is_modified() for node in self.summary_nodes)
+
+    def compare(self, baseline, key="label", stream=False, changed_only=False, chunk_size=10000):
+        """
+        Compare this calculated network with a calculated baseline network.
+        Activities are aligned by label or dbkey once, giving matching arrays of node ids, and
+        their results are compared through the snapshots' id-indexed numpy columns, chunk_size
+        activities at a time. The dummy start and finish nodes are left out. Variances are current minus baseline, in days, so a
+        positive start variance means the activity now starts later.
+
+        Parameters:
+        baseline        - a calculated ProjectNetwork
+        key             - "label" or "dbkey", how activities are matched between the networks;
+                        the keys must all be of one type (e.g. all int or all str)
+        stream          - if True return a generator of (kind, record) tuples instead of a dict,
+                        where kind is "variance" (record is an ActivityVariance), "added" or
+                        "removed" (record is the key) or "link_added" or "link_removed"
+                        (record is a (predecessor key, successor key) tuple)
+        changed_only    - only report activities with a variance or a change in critical status
+        chunk_size      - number of activities compared per vectorised step
+
+        Returns (when stream is False) a dict with keys "variances", "added", "removed",
+        "links_added" and "links_removed".
+        """
+        # check the arguments now; the generator would only raise on its first next()
+        if np is None:
+            raise ImportError("numpy is required for compare")
+        if key not in ("label", "dbkey"):
+            raise ValueError("key must be 'label' or 'dbkey', not {!r}".format(key))
+        current, previous = self.get_snapshot(), baseline.get_snapshot()
+        if current is None or previous is None:
+            raise ValueError("Both networks must be calculated before they are compared")
+        for snapshot in (current, previous):
+            keys = snapshot.get_keys(key)[0]
+            if keys.dtype == object and len(set(type(k) for k in keys.tolist())) > 1:
+                raise ValueError("Cannot compare by {}: the {}s mix types ({})".format(
+                    key, key, ", ".join(sorted(set(type(k).__name__ for k in keys.tolist())))))
+        records = self._compare(current, previous, key, changed_only, chunk_size)
+        if stream:
+            return records
+        result = {"variances": [], "added": [], "removed": [], "links_added": [], "links_removed": []}
+        lists = {"variance": "variances", "added": "added", "removed": "removed",
+                 "link_added": "links_added", "link_removed": "links_removed"}
+        for kind, record in records:
+            result[lists[kind]].append(record)
+        return result
+
+    def _compare(self, current, previous, key, changed_only, chunk_size):
+        # align once: sorted keys of both networks give the matching pairs of node ids
+        current_keys, current_ids = current.get_keys(key)
+        baseline_keys, baseline_ids = previous.get_keys(key)
+        common, current_index, baseline_index = np.intersect1d(
+            current_keys, baseline_keys, assume_unique=True, return_indices=True)
+        order = np.argsort(current_ids[current_index], kind="stable")
+        common = common[order]
+        current_rows = current_ids[current_index][order]
+        baseline_rows = baseline_ids[baseline_index][order]
+
+        columns = ("earliest_start", "earliest_finish", "float")
+        current_columns = [current.get_column(name) for name in columns]
+        baseline_columns = [previous.get_column(name) for name in columns]
+        current_critical_column = current.get_column("iscritical")
+        baseline_critical_column = previous.get_column("iscritical")
+        for i in range(0, len(common), chunk_size):
+            rows = slice(i, i + chunk_size)
+            c, b = current_rows[rows], baseline_rows[rows]
+            variance = np.column_stack([cc[c] - bc[b] for cc, bc in zip(current_columns, baseline_columns)])
+            current_critical = current_critical_column[c] != 0
+            baseline_critical = baseline_critical_column[b] != 0
+            keep = np.arange(len(c))
+            if changed_only:
+                keep = np.flatnonzero(variance.any(axis=1) | (current_critical != baseline_critical))
+            for k, start, finish, total_float, was_critical, is_critical in zip(
+                    common[rows][keep].tolist(), *variance[keep].T.tolist(),
+                    baseline_critical[keep].tolist(), current_critical[keep].tolist()):
+                yield "variance", ActivityVariance(k, start, finish, total_float, was_critical, is_critical)
+
+        for k in current_keys[~np.isin(current_keys, baseline_keys)].tolist():
+            yield "added", k
+        for k in baseline_keys[~np.isin(baseline_keys, current_keys)].tolist():
+            yield "removed", k
+
+        # encode each link as an integer pair of positions in the union of both key sets
+        union = np.union1d(current_keys, baseline_keys)
+        current_links = self._link_codes(current, key, union)
+        baseline_links = self._link_codes(previous, key, union)
+        for kind, codes in (("link_added", np.setdiff1d(current_links, baseline_links)),
+                            ("link_removed", np.setdiff1d(baseline_links, current_links))):
+            for predecessor, successor in zip(union[codes // len(union)].tolist(), union[codes % len(union)].tolist()):
+                yield kind, (predecessor, successor)
+
+    @staticmethod
+    def _link_codes(snapshot, key, union):
+        """
+        Return the snapshot's links as integer codes predecessor * len(union) + successor, where
+        each node is its key's position in union; links to unkeyed nodes are left out
+        """
+        keys, ids = snapshot.get_keys(key)
+        predecessors, successors = snapshot.get_links()
+        position = np.full(len(snapshot.get_column("duration")), -1, dtype=np.int64)
+        position[ids] = np.searchsorted(union, keys)
+        predecessors, successors = position[predecessors], position[successors]
+        keep = (predecessors >= 0) & (successors >= 0)
+        return predecessors[keep] * len(union) + successors[keep]
+
+    def get_snapshot(self):
+        """
+        Return the NetworkSnapshot published by the last calculation (None if never calculated).
+        Safe to call from any thread without locking, including while calculate() is running.
+        """
+        return self.snapshot
+
     ### Accessors and modifiers
     def get_start_node(self):
         return self.start_node
@@ -178,10 +606,153 @@ class ProjectNetwork(object):
     def set_finish_node(self, node):
         self.finish_node = node
 
+NodeResult = namedtuple("NodeResult", [
+    "label", "node_type", "duration", "sequence",
+    "earliest_start", "earliest_finish", "latest_start", "latest_finish", "float", "iscritical",
+    "earliest_start_date", "earliest_finish_date", "latest_start_date", "latest_finish_date",
+])
+
+
+Sensitivity = namedtuple("Sensitivity", [
+    "label", "duration", "float", "iscritical",
+    "increase", "decrease", "critical_threshold", "noncritical_threshold",
+])
+
+
+ActivityVariance = namedtuple("ActivityVariance", [
+    "key", "start_variance", "finish_variance", "float_variance", "baseline_critical", "current_critical",
+])
+
+
+class NetworkSnapshot(object):
+    """
+    Immutable, read-optimised copy of the results of a ProjectNetwork calculation.
+
+    A snapshot is built once by the writer and never changed afterwards, so any number of
+    reader threads can query it without locks. The critical path and its duration are
+    precomputed when the snapshot is built.
+    """
+    __slots__ = ("_nodes", "_critical_path", "_cp_duration", "_revision", "_order", "_columns", "_keys", "_links")
+
+    # numeric results kept as numpy arrays indexed by node id (when numpy is installed)
+    COLUMNS = ("duration", "earliest_start", "earliest_finish", "latest_start", "latest_finish",
+               "float", "iscritical", "sequence")
+
+    def __init__(self, network, revision, order):
+        nodes = {}
+        for node in network.id_nodes:
+            nodes[node.get_label()] = NodeResult(
+                label=node.get_label(),
+                node_type=node.get_node_type(),
+                duration=node.get_duration(),
+                sequence=node.get_sequence(),
+                earliest_start=node.get_earliest_start(),
+                earliest_finish=node.get_earliest_finish(),
+                latest_start=node.get_latest_start(),
+                latest_finish=node.get_latest_finish(),
+                float=node.get_float(),
+                iscritical=bool(node.is_critical()),
+                earliest_start_date=node.get_earliest_start_date(),
+                earliest_finish_date=node.get_earliest_finish_date(),
+                latest_start_date=node.get_latest_start_date(),
+                latest_finish_date=node.get_latest_finish_date(),
+            )
+        object.__setattr__(self, "_nodes", MappingProxyType(nodes))
+        columns = {}
+        if np is not None:
+            rows = [[getattr(result, name) for name in self.COLUMNS] for result in nodes.values()]
+            # integer day offsets stay integers; any float value makes every column float
+            dtype = np.int64 if all(isinstance(value, int) for row in rows for value in row) else float
+            values = np.array(rows, dtype=dtype).reshape(len(nodes), len(self.COLUMNS))
+            values.flags.writeable = False
+            columns = {name: values[:, i] for i, name in enumerate(self.COLUMNS)}
+        object.__setattr__(self, "_columns", columns)
+        keys = {}
+        links = ()
+        if np is not None:
+            # label and dbkey of every keyed, non-dummy node, with its id
+            for name, getter in (("label", Node.get_label), ("dbkey", Node.get_dbkey)):
+                pairs = [(getter(node), node_id) for node_id, node in enumerate(network.id_nodes)
+                         if node.get_label() not in DUMMY_LABELS and getter(node) is not None]
+                values = [value for value, _ in pairs]
+                if not values or len(set(type(value) for value in values)) > 1:
+                    values = np.array(values, dtype=object)
+                keys[name] = (np.array(values), np.array([i for _, i in pairs], dtype=np.int64))
+            node_ids = network.node_ids
+            pairs = [(node_ids[node.get_label()], node_ids[successor])
+                     for node in network.id_nodes for successor in node.successors]
+            links = (np.array([p for p, _ in pairs], dtype=np.int64), np.array([s for _, s in pairs], dtype=np.int64))
+        object.__setattr__(self, "_keys", keys)
+        object.__setattr__(self, "_links", links)
+        object.__setattr__(self, "_critical_path", tuple(network._critical_path()))
+        object.__setattr__(self, "_cp_duration", network._cp_duration())
+        object.__setattr__(self, "_revision", revision)
+        object.__setattr__(self, "_order", tuple(order))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("NetworkSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("NetworkSnapshot is immutable")
+
+    def get_nodes(self):
+        return self._nodes
+
+    def get_node_list(self):
+        return self._nodes.values()
+
+    def get_node(self, label):
+        return self._nodes.get(label)
+
+    def get_critical_path(self):
+        return list(self._critical_path)
+
+    def get_cp_duration(self):
+        return self._cp_duration
+
+    def get_revision(self):
+        return self._revision
+
+    def get_order(self):
+        """
+        Return the node ids in topological order (every node before its successors)
+        """
+        return self._order
+
+    def get_keys(self, key):
+        """
+        Return (keys, ids) numpy arrays of the label or dbkey of every non-dummy node that has
+        one, and its node id
+        """
+        if np is None:
+            raise ImportError("numpy is required for bulk accessors")
+        return self._keys[key]
+
+    def get_links(self):
+        """
+        Return (predecessor ids, successor ids) numpy arrays, one entry per link
+        """
+        if np is None:
+            raise ImportError("numpy is required for bulk accessors")
+        return self._links
+
+    def get_column(self, name):
+        """
+        Return a read-only numpy array of a result for every node, indexed by node id. The
+        columns are int64 when every result is an integer, and float otherwise.
+        """
+        if np is None:
+            raise ImportError("numpy is required for bulk accessors")
+        if name not in self._columns:
+            raise KeyError("Unknown column {!r}; expected one of {}".format(name, ", ".join(self.COLUMNS)))
+        return self._columns[name]
+
+
 class Node(object):
     def __init__(self, node_type, label, duration):
 
         ### properties / member variables
+        self.network = None         # ProjectNetwork the node was last added to
         self.node_type = node_type       # start, step, end
         self.label = label          # text, the activity/node label
         self.duration = duration    # int, in days 
@@ -199,6 +770,8 @@ class Node(object):
         self.successors = set()     # set of text/labels, set preserves uniqueness
         self.iscritical = False     # boolean
         self.seq = 0                # int
+        self.quantities = {}        # dict of name: number, e.g. cost or labour hours spread over the duration
+        self.estimates = None       # (optimistic, most likely, pessimistic) durations, or None
 
     def add_predecessors(self, predecessors):
         """
@@ -247,6 +820,38 @@ class Node(object):
     def is_critical(self):
         return self.iscritical
 
+    def set_quantity(self, name, value):
+        """
+        Set a numeric loading (cost, labour hours, ...) spread evenly over the node's duration
+
+        Parameters:
+        name    - text, the quantity name e.g. "cost"
+        value   - number, the total quantity for the node
+        """
+        self.quantities[name] = value
+
+    def get_quantity(self, name, default=0):
+        return self.quantities.get(name, default)
+
+    def get_quantities(self):
+        return self.quantities
+
+    def set_estimates(self, optimistic, most_likely, pessimistic):
+        """
+        Set a three-point (PERT) duration estimate, used by the pert module
+
+        Parameters:
+        optimistic  - number, the shortest likely duration in days
+        most_likely - number, the most likely duration in days
+        pessimistic - number, the longest likely duration in days
+        """
+        if not optimistic <= most_likely <= pessimistic:
+            raise ValueError("Estimates for node {} must satisfy optimistic <= most likely <= pessimistic".format(self.label))
+        self.estimates = (optimistic, most_likely, pessimistic)
+
+    def get_estimates(self):
+        return self.estimates
+
     # accessors and modifiers
     def get_node_type(self):
         return self.node_type
@@ -254,9 +859,24 @@ class Node(object):
     def get_label(self):
         return self.label
 
+    @property
+    def duration(self):
+        return self._duration
+
+    @duration.setter
+    def duration(self, value):
+        # a new duration invalidates the owning network's results (and any summary node
+        # wrapping it), whether set here or by assigning node.duration
+        self._duration = value
+        if self.network is not None:
+            self.network.revision += 1
+
     def get_duration(self):
         return self.duration
 
+    def set_duration(self, duration):
+        self.duration = duration
+
     def get_predecessor_list(self):
         return list(self.predecessors)
 
@@ -290,6 +910,12 @@ class Node(object):
     def get_sequence(self):
         return self.seq
 
+    def get_dbkey(self):
+        return self.dbkey
+
+    def get_float(self):
+        return self.float
+
     def set_earliest_start(self, val):
         #TODO: validate data type
         self.earliest_start = val
@@ -318,10 +944,18 @@ class Node(object):
     def set_latest_finish_date(self, lfd):
         self.latest_finish_date = lfd
 
+    def set_dbkey(self, dbkey):
+        # only for nodes not yet in a network; once added, use ProjectNetwork.set_dbkey so the
+        # network's dbkey index is updated too
+        self.dbkey = dbkey
+
+    def set_float(self, val):
+        self.float = val
+
     def set_iscritical(self, boolean):
         if not isinstance(boolean,bool):
             return
-        self.iscritical = bool
+        self.iscritical = boolean
 
     def set_sequence(self, seq):
         self.seq = seq
@@ -347,6 +981,35 @@ class Node(object):
         # return super().__str__()
         return nodestr
 
+class SummaryNode(Node):
+    """
+    A node that stands for a whole subnetwork (e.g. a standard WBS fragment).
+
+    In the outer network the summary node is a single activity whose duration is the critical
+    path duration of its subnetwork: the subnetwork's start node is the entry point and its
+    finish node the exit point, so outer links to and from the summary node connect to them.
+    The subnetwork is calculated only when it has changed since its last calculation, and the
+    same subnetwork object can be wrapped by any number of summary nodes.
+    """
+    def __init__(self, label, subnetwork, node_type="step"):
+        self.subnetwork = subnetwork
+        super(SummaryNode, self).__init__(node_type=node_type, label=label, duration=None)
+
+    @property
+    def duration(self):
+        if self.subnetwork.is_modified():
+            self.subnetwork.calculate()
+        return self.subnetwork.get_snapshot().get_cp_duration()
+
+    @duration.setter
+    def duration(self, value):
+        if value is not None:
+            raise ValueError("The duration of summary node {} comes from its subnetwork".format(self.label))
+
+    def get_subnetwork(self):
+        return self.subnetwork
+
+
 if __name__ == "__main__":
     nw = ProjectNetwork()
 
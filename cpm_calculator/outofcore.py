@@ -0,0 +1,301 @@
+"""
+Out-of-core critical path calculation for networks too large to hold as Node objects.
+
+A DiskNetwork keeps its durations, adjacency (compressed sparse rows of predecessors and of
+successors) and results in .npy files that are memory mapped. Nodes are renumbered into
+topological order when the network is created; the forward pass then works through the
+nodes in ascending chunks and the backward pass in descending chunks. Within a chunk, links
+from other chunks are resolved with vectorised numpy reductions and only the links between
+nodes of the same chunk are walked one by one.
+
+Limits:
+- The durations, adjacency and the chunk's own results are read and written sequentially,
+  but the results of the linked nodes in other chunks (earliest finishes in the forward
+  pass, latest starts in the backward pass) are gathered by random access into those
+  memory maps. This is cheap when links are mostly short-range in topological order, as in
+  real schedules, and turns into random page reads when they are not and the result files
+  do not fit in the page cache.
+- The passes' own memory is bounded by the chunk size (about 30 MB for a 5M node network
+  with the default chunks). Touched pages of the memory-mapped files also count towards the
+  process RSS, but they are page cache the OS can reclaim.
+- create() is not out-of-core: it sorts the link arrays in memory to build the adjacency,
+  so it needs memory for several copies of them (about 570 MB peak for 10M links).
+
+Each node starts at day 0 unless it has predecessors, and the critical path duration is the
+latest early finish, so a network created from a calculated ProjectNetwork (see
+from_project_network) gives the same critical path and duration. Requires numpy.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+META_FILE = "meta.json"
+LABELS_FILE = "labels.json"
+STRUCTURE = ("order", "rank", "duration", "pred_offsets", "pred_targets", "succ_offsets", "succ_targets")
+RESULTS = ("earliest_start", "earliest_finish", "latest_start", "latest_finish", "float")
+
+# values reduced over links leaving the chunk, and the links inside the chunk as
+# (chunk node, chunk target) lists in link order
+ChunkLinks = namedtuple("ChunkLinks", ["values", "internal_nodes", "internal_targets"])
+
+
+def _csr(keys, values, count):
+    """
+    Return (offsets, targets) grouping values by key, both sorted, for keys in range(count)
+    """
+    sort = np.argsort(keys, kind="stable")
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=count), out=offsets[1:])
+    return offsets, values[sort]
+
+
+def _topological_order(count, predecessors, successors):
+    """
+    Return the node ids in topological order, processing whole wavefronts of nodes whose
+    predecessors have all been placed
+    """
+    offsets, targets = _csr(predecessors, successors, count)
+    indegree = np.bincount(successors, minlength=count)
+    frontier = np.flatnonzero(indegree == 0)
+    parts = []
+    placed = 0
+    while frontier.size:
+        parts.append(frontier)
+        placed += frontier.size
+        starts = offsets[frontier]
+        lengths = offsets[frontier + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            break
+        index = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        reached, decrement = np.unique(targets[index], return_counts=True)
+        indegree[reached] -= decrement
+        frontier = reached[indegree[reached] == 0]
+    if placed != count:
+        raise ValueError("The project network contains a loop")
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+
+def generate_network(directory, nodes, links_per_node=2, span=1000, max_duration=10, seed=None):
+    """
+    Write a random network for testing and return it as a DiskNetwork. Every node after the
+    first gets links_per_node predecessors chosen among the span nodes before it, so node ids
+    are already in topological order.
+
+    Parameters:
+    directory       - directory to write to
+    nodes           - number of nodes
+    links_per_node  - predecessors per node (some may repeat)
+    span            - how far back a predecessor may be
+    max_duration    - durations are drawn from 1 .. max_duration - 1
+    seed            - random seed
+    """
+    rng = np.random.default_rng(seed)
+    successors = np.repeat(np.arange(1, nodes, dtype=np.int64), links_per_node)
+    predecessors = np.maximum(successors - rng.integers(1, span + 1, len(successors)), 0)
+    durations = rng.integers(1, max_duration, nodes)
+    return DiskNetwork.create(directory, durations, predecessors, successors)
+
+
+class DiskNetwork(object):
+    """
+    A project network stored in memory-mapped files in a directory
+
+    Parameters:
+    directory   - a directory written by DiskNetwork.create
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.node_count = self.meta["nodes"]
+        self.link_count = self.meta["links"]
+        for name in STRUCTURE:
+            setattr(self, name, np.load(self._path(name), mmap_mode="r"))
+        self.labels = None
+        if os.path.exists(os.path.join(directory, LABELS_FILE)):
+            with open(os.path.join(directory, LABELS_FILE)) as f:
+                self.labels = json.load(f)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".npy")
+
+    @classmethod
+    def create(cls, directory, durations, predecessors, successors, labels=None):
+        """
+        Write a network to a directory and return it as a DiskNetwork.
+        Node ids are 0 .. len(durations) - 1; links are given as two equal length arrays.
+        Building the adjacency sorts the link arrays in memory; the passes do not.
+
+        Parameters:
+        directory       - directory to write to (created if missing)
+        durations       - array of node durations indexed by node id
+        predecessors    - array of the predecessor node id of each link
+        successors      - array of the successor node id of each link
+        labels          - optional list of node labels indexed by node id
+        """
+        os.makedirs(directory, exist_ok=True)
+        durations = np.asarray(durations)
+        dtype = np.int64 if durations.dtype.kind in "iub" else np.float64
+        count = len(durations)
+        predecessors = np.asarray(predecessors, dtype=np.int64)
+        successors = np.asarray(successors, dtype=np.int64)
+        if len(predecessors) != len(successors):
+            raise ValueError("predecessors and successors must be the same length")
+
+        if len(predecessors) and not np.all(predecessors < successors):
+            order = _topological_order(count, predecessors, successors)
+            rank = np.empty(count, dtype=np.int64)
+            rank[order] = np.arange(count)
+            predecessors = rank[predecessors]
+            successors = rank[successors]
+        else:
+            order = np.arange(count, dtype=np.int64)
+            rank = order
+
+        pred_offsets, pred_targets = _csr(successors, predecessors, count)
+        succ_offsets, succ_targets = _csr(predecessors, successors, count)
+        arrays = {
+            "order": order,
+            "rank": rank,
+            "duration": durations[order].astype(dtype),
+            "pred_offsets": pred_offsets,
+            "pred_targets": pred_targets,
+            "succ_offsets": succ_offsets,
+            "succ_targets": succ_targets,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, name + ".npy"), array)
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump({"nodes": count, "links": len(predecessors), "dtype": np.dtype(dtype).name}, f)
+        if labels is not None:
+            with open(os.path.join(directory, LABELS_FILE), "w") as f:
+                json.dump(list(labels), f)
+        return cls(directory)
+
+    @classmethod
+    def from_project_network(cls, network, directory):
+        """
+        Write an in-memory ProjectNetwork to a directory and return it as a DiskNetwork.
+        Node ids are the ProjectNetwork's integer node ids.
+        """
+        labels = [node.get_label() for node in network.id_nodes]
+        durations = np.array([node.get_duration() for node in network.id_nodes])
+        predecessors = []
+        successors = []
+        for node_id, node in enumerate(network.id_nodes):
+            for successor in node.get_successor_list():
+                predecessors.append(node_id)
+                successors.append(network.get_node_id(successor))
+        return cls.create(directory, durations, predecessors, successors, labels)
+
+    def calculate(self, chunk_size=1 << 20):
+        """
+        Run the forward and backward passes over the memory-mapped network in chunks of
+        chunk_size nodes, writing the results to the directory
+
+        Parameters:
+        chunk_size  - number of nodes processed per step; bounds the resident memory
+        """
+        dtype = np.dtype(self.meta["dtype"])
+        results = {name: open_memmap(self._path(name), mode="w+", dtype=dtype, shape=(self.node_count,))
+                   for name in RESULTS}
+        earliest_start, earliest_finish = results["earliest_start"], results["earliest_finish"]
+        latest_start, latest_finish = results["latest_start"], results["latest_finish"]
+
+        cp_duration = 0
+        for lo in range(0, self.node_count, chunk_size):
+            hi = min(lo + chunk_size, self.node_count)
+            duration = np.asarray(self.duration[lo:hi])
+            links = self._reduce_chunk(lo, hi, self.pred_offsets, self.pred_targets,
+                                       earliest_finish, np.maximum, 0, dtype, external=lambda t: t < lo)
+            starts = links.values.tolist()
+            durations = duration.tolist()
+            # a predecessor's links come before its successor's, so its start is already final
+            for node, predecessor in zip(links.internal_nodes, links.internal_targets):
+                finish = starts[predecessor] + durations[predecessor]
+                if finish > starts[node]:
+                    starts[node] = finish
+            starts = np.array(starts, dtype=dtype)
+            earliest_start[lo:hi] = starts
+            earliest_finish[lo:hi] = starts + duration
+            if hi > lo:
+                cp_duration = max(cp_duration, earliest_finish[lo:hi].max())
+
+        for hi in range(self.node_count, 0, -chunk_size):
+            lo = max(hi - chunk_size, 0)
+            duration = np.asarray(self.duration[lo:hi])
+            links = self._reduce_chunk(lo, hi, self.succ_offsets, self.succ_targets,
+                                       latest_start, np.minimum, cp_duration, dtype, external=lambda t: t >= hi)
+            finishes = links.values.tolist()
+            durations = duration.tolist()
+            for node, successor in zip(reversed(links.internal_nodes), reversed(links.internal_targets)):
+                start = finishes[successor] - durations[successor]
+                if start < finishes[node]:
+                    finishes[node] = start
+            finishes = np.array(finishes, dtype=dtype)
+            latest_finish[lo:hi] = finishes
+            latest_start[lo:hi] = finishes - duration
+            results["float"][lo:hi] = latest_start[lo:hi] - earliest_start[lo:hi]
+
+        for array in results.values():
+            array.flush()
+        self.meta["cp_duration"] = cp_duration.item() if hasattr(cp_duration, "item") else cp_duration
+        with open(os.path.join(self.directory, META_FILE), "w") as f:
+            json.dump(self.meta, f)
+
+    def _reduce_chunk(self, lo, hi, offsets, targets, values, reduce, default, dtype, external):
+        """
+        Reduce the values of each chunk node's linked nodes that lie outside the chunk, and
+        return the links that stay inside the chunk (as chunk-relative positions) to be walked
+        in order
+        """
+        chunk_offsets = np.asarray(offsets[lo:hi + 1])
+        chunk_targets = np.asarray(targets[chunk_offsets[0]:chunk_offsets[-1]])
+        chunk_offsets = chunk_offsets - chunk_offsets[0]
+        counts = np.diff(chunk_offsets)
+        outside = external(chunk_targets)
+
+        linked = np.full(len(chunk_targets), default, dtype=dtype)
+        linked[outside] = values[chunk_targets[outside]]
+        reduced = np.full(hi - lo, default, dtype=dtype)
+        nonempty = counts > 0
+        if len(linked):
+            reduced[nonempty] = reduce.reduceat(linked, chunk_offsets[:-1][nonempty])
+
+        inside = np.flatnonzero(~outside)
+        nodes = np.repeat(np.arange(hi - lo), counts)[inside]
+        return ChunkLinks(reduced, nodes.tolist(), (chunk_targets[inside] - lo).tolist())
+
+    def _result(self, name):
+        return np.load(self._path(name), mmap_mode="r")
+
+    def get_cp_duration(self):
+        return self.meta["cp_duration"]
+
+    def get_critical_path(self, chunk_size=1 << 20):
+        """
+        Return the critical nodes (labels if the network has them, otherwise node ids) in
+        order of earliest start
+        """
+        total_float = self._result("float")
+        positions = np.concatenate([
+            np.flatnonzero(total_float[lo:lo + chunk_size] == 0) + lo
+            for lo in range(0, self.node_count, chunk_size)
+        ] or [np.zeros(0, dtype=np.int64)])
+        starts = self._result("earliest_start")[positions]
+        positions = positions[np.lexsort((positions, starts))]
+        ids = np.asarray(self.order[positions])
+        if self.labels is not None:
+            return [self.labels[i] for i in ids.tolist()]
+        return ids.tolist()
+
+    def get_values(self, ids, field):
+        """
+        Return a result ("earliest_start", "latest_finish", "float", ...) for an array of node ids
+        """
+        return self._result(field)[np.asarray(self.rank[np.asarray(ids)])]
+
@@ -0,0 +1,183 @@
+"""
+Analytic PERT estimate of the project finish, without sampling.
+
+Each node's duration is treated as a random variable with the PERT mean (o + 4m + p) / 6 and
+variance ((p - o) / 6) ** 2 of its three-point estimate (see Node.set_estimates), or as a
+fixed value if it has no estimate. Means and variances are propagated in one pass over the
+network in topological order. Where paths merge, the maximum of the finishes is
+approximated by a normal distribution using Clark's formulas.
+
+Clark's formulas need the covariance of the merging finishes, which comes from the
+activities the paths share. Each finish is kept in the first-order "canonical form" used in
+statistical timing analysis: a mean, a coefficient for each activity whose duration it
+depends on (the finish's sensitivity to that activity's standardised duration), and an
+independent remainder. The covariance of two finishes is the sum of the products of their
+shared coefficients, so independent branches have none and branches that fan out from a
+common activity share exactly that activity's variance. At a merge the coefficients are
+blended by the probability that each side is the later, and any variance they no longer
+explain goes to the remainder. Each finish keeps at most basis_size coefficients, the
+largest ones, with the rest folded into its independent remainder, so the whole estimate is
+O((nodes + links) x basis_size).
+
+Merging predecessors are combined pairwise in order of descending mean finish (ties by
+label), which keeps the result independent of set ordering and is the usual ordering for
+accuracy.
+"""
+import math
+from collections import namedtuple
+from statistics import NormalDist
+
+STANDARD_NORMAL = NormalDist()
+
+# a node's finish in canonical form: mean, total variance, {label: coefficient} on the
+# standardised durations of the activities it depends on, and the independent remainder
+Finish = namedtuple("Finish", ["mean", "variance", "coefficients", "remainder"])
+
+DEFAULT_BASIS_SIZE = 32
+
+
+def node_moments(node):
+    """
+    Return the (mean, variance) of a node's duration
+    """
+    estimates = node.get_estimates()
+    if estimates is None:
+        return node.get_duration(), 0.0
+    optimistic, most_likely, pessimistic = estimates
+    return (optimistic + 4 * most_likely + pessimistic) / 6.0, ((pessimistic - optimistic) / 6.0) ** 2
+
+
+def clark_max(mean_a, variance_a, mean_b, variance_b, covariance=0.0):
+    """
+    Approximate max(A, B) of two normal variables by a normal variable (Clark, 1961).
+    Returns (mean, variance, probability that A is the larger).
+    """
+    spread = variance_a + variance_b - 2 * covariance
+    if spread <= 1e-12:
+        if mean_a == mean_b:
+            return mean_a, max(variance_a, variance_b), 0.5
+        return (mean_a, variance_a, 1.0) if mean_a > mean_b else (mean_b, variance_b, 0.0)
+    a = math.sqrt(spread)
+    alpha = (mean_a - mean_b) / a
+    p = STANDARD_NORMAL.cdf(alpha)
+    q = 1.0 - p
+    density = STANDARD_NORMAL.pdf(alpha)
+    mean = mean_a * p + mean_b * q + a * density
+    second = (mean_a ** 2 + variance_a) * p + (mean_b ** 2 + variance_b) * q + (mean_a + mean_b) * a * density
+    return mean, max(second - mean ** 2, 0.0), p
+
+
+class FinishEstimate(object):
+    """
+    Approximate distribution of the project finish (days from the start) and the probability
+    that each node is on the critical path
+    """
+    def __init__(self, mean, variance, criticality, finishes):
+        self.mean = mean
+        self.variance = variance
+        self.criticality = criticality  # dict of label: probability the node is critical
+        self.finishes = finishes        # dict of label: Finish
+
+    def get_std(self):
+        return math.sqrt(self.variance)
+
+    def get_distribution(self):
+        return NormalDist(self.mean, self.get_std()) if self.variance > 0 else None
+
+    def probability(self, duration):
+        """
+        Return the probability that the project finishes within duration days
+        """
+        if self.variance <= 0:
+            return 1.0 if duration >= self.mean else 0.0
+        return self.get_distribution().cdf(duration)
+
+    def percentile(self, p):
+        """
+        Return the duration the project finishes within with probability p (0 < p < 1)
+        """
+        if self.variance <= 0:
+            return self.mean
+        return self.get_distribution().inv_cdf(p)
+
+    def get_criticality(self, label):
+        return self.criticality.get(label, 0.0)
+
+
+def _covariance(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(coefficient * b[label] for label, coefficient in a.items() if label in b)
+
+
+def _truncate(coefficients, remainder, basis_size):
+    """
+    Keep the basis_size largest coefficients and fold the variance of the rest into the remainder
+    """
+    if len(coefficients) <= basis_size:
+        return coefficients, remainder
+    ranked = sorted(coefficients.items(), key=lambda item: (-item[1] ** 2, item[0]))
+    remainder += sum(coefficient ** 2 for _, coefficient in ranked[basis_size:])
+    return dict(ranked[:basis_size]), remainder
+
+
+def _merge(a, b, basis_size):
+    """
+    Return the canonical form of max(a, b) and the probability that a is the later
+    """
+    mean, variance, p = clark_max(a.mean, a.variance, b.mean, b.variance, _covariance(a.coefficients, b.coefficients))
+    coefficients = {}
+    for label, coefficient in a.coefficients.items():
+        coefficients[label] = p * coefficient
+    for label, coefficient in b.coefficients.items():
+        coefficients[label] = coefficients.get(label, 0.0) + (1.0 - p) * coefficient
+    explained = sum(coefficient ** 2 for coefficient in coefficients.values())
+    coefficients, remainder = _truncate(coefficients, max(variance - explained, 0.0), basis_size)
+    return Finish(mean, variance, coefficients, remainder), p
+
+
+def estimate_finish(network, basis_size=DEFAULT_BASIS_SIZE):
+    """
+    Estimate the finish distribution and node criticality of a project network in one
+    forward pass (canonical forms of the finishes) and one backward pass (criticality)
+
+    Parameters:
+    network     - a ProjectNetwork with a finish node; nodes may have three-point estimates
+    basis_size  - the most activity coefficients kept per finish (see the module docstring)
+    """
+    order = network.topological_order()
+    finishes = {}
+    drivers = {}    # label: list of (predecessor label, probability it drives this node's start)
+    for label in order:
+        node = network.get_node(label)
+        predecessors = sorted(node.get_predecessor_list(), key=lambda p: (-finishes[p].mean, p))
+        if predecessors:
+            start = finishes[predecessors[0]]
+            probabilities = [1.0]
+            for predecessor in predecessors[1:]:
+                start, p = _merge(start, finishes[predecessor], basis_size)
+                probabilities = [probability * p for probability in probabilities] + [1.0 - p]
+            drivers[label] = list(zip(predecessors, probabilities))
+        else:
+            drivers[label] = []
+            start = Finish(0.0, 0.0, {}, 0.0)
+        duration_mean, duration_variance = node_moments(node)
+        coefficients = start.coefficients
+        if duration_variance > 0:
+            coefficients = dict(coefficients)
+            coefficients[label] = math.sqrt(duration_variance)
+            coefficients, remainder = _truncate(coefficients, start.remainder, basis_size)
+        else:
+            remainder = start.remainder
+        finishes[label] = Finish(start.mean + duration_mean, start.variance + duration_variance,
+                                 coefficients, remainder)
+
+    finish_label = network.get_finish_node().get_label()
+    criticality = {label: 0.0 for label in order}
+    criticality[finish_label] = 1.0
+    for label in reversed(order):
+        for predecessor, probability in drivers[label]:
+            criticality[predecessor] += criticality[label] * probability
+
+    finish = finishes[finish_label]
+    return FinishEstimate(finish.mean, finish.variance, criticality, finishes)
@@ -0,0 +1,110 @@
+"""
+Time-phased totals (histograms) and cumulative S-curves of node quantities.
+
+Each node's quantity (see Node.set_quantity) is spread evenly over the days it is active,
+from its start to its finish, using early dates, late dates or both. Totals are built with a
+difference array - each node adds its daily rate at its start day and removes it at its
+finish day, and a cumulative sum gives the daily totals - so the cost is O(nodes + days)
+rather than O(nodes x days). Requires numpy.
+
+Periods are counted in the network's own day offsets (the integers calculate() produces),
+not calendar dates. Period 0 begins at offset 0, the start node's earliest start, and a
+"week" is simply 7 consecutive offsets, so weeks are not aligned to calendar weeks. If the
+network's dates are calculated with workdays=True, each offset is a working day and a
+"week" covers 7 working days; use period=5 for working weeks of five days. Map period n
+back to a date with the same start date and workday setting used for update_dates_*.
+"""
+import numpy as np
+
+BASES = ("early", "late", "both")
+PERIODS = {"day": 1, "week": 7}
+
+
+def _period_length(period):
+    if period in PERIODS:
+        return PERIODS[period]
+    if isinstance(period, int) and period > 0:
+        return period
+    raise ValueError("period must be 'day', 'week' or a positive number of days, not {!r}".format(period))
+
+
+def _node_columns(snapshot, network, quantity):
+    """
+    Return numpy columns of quantity, early start, late start and duration for all nodes
+    that carry the quantity. The dates and durations come from the snapshot's id-indexed
+    columns, so a calculation running at the same time cannot leave them half updated; only
+    the quantities are read from the nodes.
+    """
+    count = len(snapshot.get_column("duration"))
+    pairs = [(node_id, node.get_quantity(quantity)) for node_id, node in enumerate(network.id_nodes[:count])
+             if node.get_quantity(quantity)]
+    ids = np.array([node_id for node_id, _ in pairs], dtype=np.int64)
+    values = np.array([value for _, value in pairs], dtype=float)
+    early_starts = np.floor(snapshot.get_column("earliest_start")[ids]).astype(np.int64)
+    late_starts = np.floor(snapshot.get_column("latest_start")[ids]).astype(np.int64)
+    durations = np.ceil(snapshot.get_column("duration")[ids]).astype(np.int64)
+    return values, early_starts, late_starts, durations
+
+
+def _spread(values, starts, durations, days):
+    """
+    Spread each value evenly over [start, start + duration) days and return the daily totals.
+    Zero duration nodes put their whole value on their start day.
+    """
+    spans = np.maximum(durations, 1)
+    rates = values / spans
+    diff = np.bincount(starts, weights=rates, minlength=days + 1)
+    diff -= np.bincount(starts + spans, weights=rates, minlength=days + 1)
+    return np.cumsum(diff[:days])
+
+
+def _to_periods(daily, length):
+    if length == 1:
+        return daily
+    padded = np.zeros(-(-len(daily) // length) * length)
+    padded[:len(daily)] = daily
+    return padded.reshape(-1, length).sum(axis=1)
+
+
+def time_phase(network, quantity, basis="early", period="day"):
+    """
+    Return the total of a node quantity in each period of a calculated project network.
+    Periods are runs of day offsets, not calendar periods: period n covers offsets
+    [n * length, (n + 1) * length), where length is 1 for "day" and 7 for "week".
+
+    Parameters:
+    network     - a calculated ProjectNetwork
+    quantity    - text, the quantity name set with Node.set_quantity
+    basis       - "early", "late" or "both"; "both" returns an (early, late) tuple
+    period      - "day", "week" or a number of day offsets per period
+    """
+    if basis not in BASES:
+        raise ValueError("basis must be one of {}, not {!r}".format(", ".join(BASES), basis))
+    length = _period_length(period)
+    snapshot = network.get_snapshot()
+    if snapshot is None:
+        raise ValueError("The network has not been calculated")
+    values, early_starts, late_starts, durations = _node_columns(snapshot, network, quantity)
+    days = int(np.ceil(snapshot.get_cp_duration())) + 1
+    if len(values):
+        days = max(days, int((np.maximum(late_starts, early_starts) + np.maximum(durations, 1)).max()))
+
+    early = late = None
+    if basis in ("early", "both"):
+        early = _to_periods(_spread(values, early_starts, durations, days), length)
+    if basis in ("late", "both"):
+        late = _to_periods(_spread(values, late_starts, durations, days), length)
+    if basis == "both":
+        return early, late
+    return early if basis == "early" else late
+
+
+def s_curve(network, quantity, basis="early", period="day"):
+    """
+    Return the cumulative total of a node quantity at the end of each period
+    (see time_phase for the parameters)
+    """
+    totals = time_phase(network, quantity, basis, period)
+    if basis == "both":
+        return np.cumsum(totals[0]), np.cumsum(totals[1])
+    return np.cumsum(totals)
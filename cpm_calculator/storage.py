@@ -0,0 +1,198 @@
+"""
+SQLite persistence for project networks.
+
+Nodes, links and calculated results are stored keyed by Node.dbkey. The store reads the
+stored rows when it is opened and remembers what it last loaded or saved, so save() writes
+back only the nodes and links that differ from the database, in a single transaction. The dummy start and finish nodes are not stored; recreate them with
+set_dummy_start_node / set_dummy_finish_node after loading. Summary nodes are not supported:
+save() rejects them, as their subnetworks have no table to go in.
+"""
+import json
+import sqlite3
+from datetime import date, datetime
+
+from cpm_calculator.cpm import DUMMY_LABELS, ProjectNetwork, Node, SummaryNode
+
+NODE_COLUMNS = (
+    "dbkey", "label", "node_type", "duration",
+    "earliest_start", "earliest_finish", "latest_start", "latest_finish", "float", "iscritical", "seq",
+    "earliest_start_date", "earliest_finish_date", "latest_start_date", "latest_finish_date",
+    "quantities",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    dbkey PRIMARY KEY,
+    label TEXT NOT NULL,
+    node_type TEXT NOT NULL,
+    duration NUMERIC,
+    earliest_start NUMERIC,
+    earliest_finish NUMERIC,
+    latest_start NUMERIC,
+    latest_finish NUMERIC,
+    float NUMERIC,
+    iscritical INTEGER,
+    seq INTEGER,
+    earliest_start_date TEXT,
+    earliest_finish_date TEXT,
+    latest_start_date TEXT,
+    latest_finish_date TEXT,
+    quantities TEXT
+);
+CREATE TABLE IF NOT EXISTS links (
+    predecessor NOT NULL,
+    successor NOT NULL,
+    PRIMARY KEY (predecessor, successor)
+);
+"""
+
+
+def _format_date(value):
+    return value.isoformat() if value is not None else None
+
+
+def _parse_date(value):
+    if value is None:
+        return None
+    if "T" in value or " " in value:
+        return datetime.fromisoformat(value)
+    return date.fromisoformat(value)
+
+
+class SQLiteStore(object):
+    """
+    Loads and saves a ProjectNetwork to an SQLite database
+
+    Parameters:
+    path        - database file name, or ":memory:"
+    batch_size  - number of rows fetched per round trip when reading the database
+    """
+    def __init__(self, path, batch_size=10000):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self._saved_nodes = {}      # dbkey: row tuple as last loaded or saved
+        self._saved_links = set()   # (predecessor dbkey, successor dbkey)
+        for row in self._select("SELECT {} FROM nodes".format(", ".join(NODE_COLUMNS))):
+            self._saved_nodes[row[0]] = row
+        self._saved_links.update(self._select("SELECT predecessor, successor FROM links"))
+
+    def _select(self, sql):
+        """
+        Yield the rows of a query, fetching batch_size rows per round trip
+        """
+        cursor = self.connection.execute(sql)
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+    def _node_row(self, node):
+        return (
+            node.get_dbkey(), node.get_label(), node.get_node_type(), node.get_duration(),
+            node.get_earliest_start(), node.get_earliest_finish(),
+            node.get_latest_start(), node.get_latest_finish(),
+            node.get_float(), int(bool(node.is_critical())), node.get_sequence(),
+            _format_date(node.get_earliest_start_date()), _format_date(node.get_earliest_finish_date()),
+            _format_date(node.get_latest_start_date()), _format_date(node.get_latest_finish_date()),
+            json.dumps(node.get_quantities(), sort_keys=True) if node.get_quantities() else None,
+        )
+
+    def _stored_nodes(self, network):
+        nodes = [node for node in network.get_node_list() if node.get_label() not in DUMMY_LABELS]
+        for node in nodes:
+            if isinstance(node, SummaryNode):
+                raise ValueError("Summary node {} cannot be stored; its subnetwork would be lost".format(node.get_label()))
+            if node.get_dbkey() is None:
+                raise ValueError("Node {} has no dbkey and cannot be stored".format(node.get_label()))
+        return nodes
+
+    def save(self, network):
+        """
+        Write the nodes, links and results that changed since the last load or save, in one
+        transaction. Returns the number of node and link rows written or deleted.
+
+        Parameters:
+        network - a ProjectNetwork whose (non-dummy) nodes all have a dbkey and none is a
+                SummaryNode
+        """
+        nodes = self._stored_nodes(network)
+        rows = {}
+        links = set()
+        for node in nodes:
+            rows[node.get_dbkey()] = self._node_row(node)
+            for successor in node.get_successor_list():
+                successor_node = network.get_node(successor)
+                if successor_node.get_label() not in DUMMY_LABELS:
+                    links.add((node.get_dbkey(), successor_node.get_dbkey()))
+
+        changed = [row for dbkey, row in rows.items() if self._saved_nodes.get(dbkey) != row]
+        removed = [(dbkey,) for dbkey in self._saved_nodes if dbkey not in rows]
+        added_links = links - self._saved_links
+        removed_links = self._saved_links - links
+
+        with self.connection:
+            if removed:
+                self.connection.executemany("DELETE FROM nodes WHERE dbkey = ?", removed)
+            if changed:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO nodes ({}) VALUES ({})".format(
+                        ", ".join(NODE_COLUMNS), ", ".join("?" * len(NODE_COLUMNS))),
+                    changed,
+                )
+            if removed_links:
+                self.connection.executemany(
+                    "DELETE FROM links WHERE predecessor = ? AND successor = ?", removed_links)
+            if added_links:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO links (predecessor, successor) VALUES (?, ?)", added_links)
+
+        self._saved_nodes = rows
+        self._saved_links = links
+        return len(changed) + len(removed) + len(added_links) + len(removed_links)
+
+    def load(self):
+        """
+        Read the stored network, including any stored results, into a new ProjectNetwork
+        """
+        network = ProjectNetwork()
+        saved_nodes = {}
+        labels = {}
+        for row in self._select("SELECT {} FROM nodes".format(", ".join(NODE_COLUMNS))):
+            (dbkey, label, node_type, duration, es, ef, ls, lf, float_, iscritical, seq,
+             esd, efd, lsd, lfd, quantities) = row
+            node = Node(node_type=node_type, label=label, duration=duration)
+            node.set_dbkey(dbkey)
+            node.set_earliest_start(es)
+            node.set_earliest_finish(ef)
+            node.set_latest_start(ls)
+            node.set_latest_finish(lf)
+            node.set_float(float_)
+            node.set_iscritical(bool(iscritical))
+            node.set_sequence(seq)
+            node.set_earliest_start_date(_parse_date(esd))
+            node.set_earliest_finish_date(_parse_date(efd))
+            node.set_latest_start_date(_parse_date(lsd))
+            node.set_latest_finish_date(_parse_date(lfd))
+            if quantities:
+                node.quantities = json.loads(quantities)
+            network.add_node(node)
+            saved_nodes[dbkey] = row
+            labels[dbkey] = label
+
+        saved_links = set()
+        nodes = network.get_nodes()
+        for predecessor, successor in self._select("SELECT predecessor, successor FROM links"):
+            # add to the sets directly; add_successors rebuilds the set on every call
+            nodes[labels[predecessor]].successors.add(labels[successor])
+            nodes[labels[successor]].predecessors.add(labels[predecessor])
+            saved_links.add((predecessor, successor))
+
+        self._saved_nodes = saved_nodes
+        self._saved_links = saved_links
+        return network
+
+    def close(self):
+        self.connection.close()
@@ -26,6 +26,14 @@ setuptools.setup(
     keywords='criticalpath',
     python_requires='>=3',
     install_requires=['datetime', 'workdays'],  # Optional
+    extras_require={  # Optional
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': [
+            'cpm-calc=cpm_calculator.cli:main',
+        ],
+    },
      project_urls={  # Optional
         'Source': 'https://github.com/roryfrench/CPM',
     },
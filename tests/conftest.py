@@ -0,0 +1,28 @@
+import pytest
+
+from cpm_calculator.cli import build_network
+
+
+# the example network from testcpm.py: critical path A,B,D,G,H (19 days)
+SAMPLE_ACTIVITIES = [
+    {"label": "A", "duration": 3, "successors": "B,C"},
+    {"label": "B", "duration": 4, "successors": "D"},
+    {"label": "C", "duration": 2, "successors": "E,F"},
+    {"label": "D", "duration": 5, "successors": "G"},
+    {"label": "E", "duration": 1, "successors": "G"},
+    {"label": "F", "duration": 2, "successors": "H"},
+    {"label": "G", "duration": 4, "successors": "H"},
+    {"label": "H", "duration": 3, "successors": None},
+]
+
+
+@pytest.fixture
+def activities():
+    return [dict(activity, dbkey=100 + i) for i, activity in enumerate(SAMPLE_ACTIVITIES)]
+
+
+@pytest.fixture
+def network(activities):
+    network = build_network(activities)
+    network.calculate()
+    return network
@@ -0,0 +1,108 @@
+import json
+import time
+
+from cpm_calculator.cli import find_schedules, main, read_activities
+
+from conftest import SAMPLE_ACTIVITIES
+
+
+def write_json(path, activities):
+    path.write_text(json.dumps(activities))
+    return path
+
+
+def write_csv(path, activities):
+    lines = ["label,duration,successors,dbkey"]
+    for i, activity in enumerate(activities):
+        successors = (activity["successors"] or "").replace(",", ";")
+        lines.append("{},{},{},{}".format(activity["label"], activity["duration"], successors, i))
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def run(capsys, argv):
+    code = main(argv)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return code, {result["file"]: result for result in lines}
+
+
+def test_read_activities_csv_and_json(tmp_path):
+    from_csv = read_activities(str(write_csv(tmp_path / "a.csv", SAMPLE_ACTIVITIES)))
+    assert from_csv[0] == {"label": "A", "duration": 3, "successors": "B,C", "dbkey": "0"}
+    from_json = read_activities(str(write_json(tmp_path / "a.json", {"activities": SAMPLE_ACTIVITIES})))
+    assert from_json == SAMPLE_ACTIVITIES
+
+
+def test_find_schedules_expands_directories_and_globs(tmp_path):
+    write_json(tmp_path / "b.json", SAMPLE_ACTIVITIES)
+    write_csv(tmp_path / "a.csv", SAMPLE_ACTIVITIES)
+    (tmp_path / "notes.txt").write_text("not a schedule")
+    assert find_schedules([str(tmp_path)]) == [str(tmp_path / "a.csv"), str(tmp_path / "b.json")]
+    assert find_schedules([str(tmp_path / "*.json")]) == [str(tmp_path / "b.json")]
+
+
+def test_main_reports_each_file(tmp_path, capsys):
+    write_json(tmp_path / "a.json", SAMPLE_ACTIVITIES)
+    write_csv(tmp_path / "b.csv", SAMPLE_ACTIVITIES)
+    code, results = run(capsys, [str(tmp_path), "--start-date", "2026-01-05"])
+    assert code == 0
+    assert len(results) == 2
+    for result in results.values():
+        assert result["critical_path"] == ["A", "B", "D", "G", "H"]
+        assert result["duration"] == 19
+        assert result["start_date"] == "2026-01-05"
+        assert result["finish_date"] == "2026-01-24"
+        assert result["activities"]["C"]["float"] == 6
+        assert "dummy start" not in result["activities"]
+
+
+def test_main_with_jobs(tmp_path, capsys):
+    for i in range(4):
+        write_json(tmp_path / "s{}.json".format(i), SAMPLE_ACTIVITIES)
+    code, results = run(capsys, [str(tmp_path), "--jobs", "2"])
+    assert code == 0
+    assert sorted(results) == [str(tmp_path / "s{}.json".format(i)) for i in range(4)]
+    assert all(result["duration"] == 19 for result in results.values())
+
+
+def test_errors_are_reported_and_set_exit_code(tmp_path, capsys):
+    write_json(tmp_path / "good.json", SAMPLE_ACTIVITIES)
+    write_json(tmp_path / "unknown.json", [{"label": "A", "duration": 1, "successors": "Z"}])
+    write_json(tmp_path / "loop.json", [{"label": "A", "duration": 1, "successors": "B"},
+                                        {"label": "B", "duration": 1, "successors": "A"}])
+    (tmp_path / "broken.json").write_text("{")
+    code, results = run(capsys, [str(tmp_path)])
+    assert code == 1
+    assert "error" not in results[str(tmp_path / "good.json")]
+    assert results[str(tmp_path / "unknown.json")]["error"] == "ValueError: Activity A has unknown successor Z"
+    assert results[str(tmp_path / "loop.json")]["error"].startswith("ValueError")
+    assert results[str(tmp_path / "broken.json")]["error"].startswith("JSONDecodeError")
+
+
+def test_long_chain(tmp_path, capsys):
+    count = 5000
+    chain = [{"label": "a{}".format(i), "duration": 1, "successors": "a{}".format(i + 1) if i + 1 < count else ""}
+             for i in range(count)]
+    write_json(tmp_path / "chain.json", chain)
+    code, results = run(capsys, [str(tmp_path / "chain.json")])
+    assert code == 0
+    result = results[str(tmp_path / "chain.json")]
+    assert result["duration"] == count
+    assert len(result["critical_path"]) == count
+
+
+def test_layered_network_is_linear(tmp_path, capsys):
+    # two activities per layer, each linked to both activities of the next layer: the number of
+    # paths doubles with every layer, so a path-by-path pass would never finish
+    layers = 200
+    activities = []
+    for layer in range(layers):
+        successors = ",".join("l{}n{}".format(layer + 1, j) for j in range(2)) if layer + 1 < layers else ""
+        for j in range(2):
+            activities.append({"label": "l{}n{}".format(layer, j), "duration": j + 1, "successors": successors})
+    write_json(tmp_path / "layers.json", activities)
+    began = time.perf_counter()
+    code, results = run(capsys, [str(tmp_path / "layers.json")])
+    assert time.perf_counter() - began < 10
+    assert code == 0
+    assert results[str(tmp_path / "layers.json")]["duration"] == 2 * layers
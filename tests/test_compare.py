@@ -0,0 +1,79 @@
+import pytest
+
+from cpm_calculator.cli import build_network
+from cpm_calculator.cpm import ActivityVariance
+
+
+@pytest.fixture
+def current(activities):
+    activities = [dict(a) for a in activities if a["label"] != "F"]
+    activities[2]["successors"] = "E"     # C no longer precedes F
+    activities[2]["duration"] = 12
+    activities.append({"label": "Z", "duration": 1, "dbkey": 999, "successors": "H"})
+    network = build_network(activities)
+    network.calculate()
+    return network
+
+
+def test_compare_by_label(current, network):
+    report = current.compare(network, changed_only=True)
+    variances = {v.key: v for v in report["variances"]}
+    assert variances["C"] == ActivityVariance("C", 0, 10, -6, False, True)
+    assert variances["B"] == ActivityVariance("B", 0, 0, 4, True, False)
+    assert "A" not in variances
+    assert report["added"] == ["Z"]
+    assert report["removed"] == ["F"]
+    assert report["links_added"] == [("Z", "H")]
+    assert sorted(report["links_removed"]) == [("C", "F"), ("F", "H")]
+
+
+def test_dummy_nodes_are_not_compared(current, network):
+    report = current.compare(network)
+    keys = [v.key for v in report["variances"]]
+    assert keys == ["A", "B", "C", "D", "E", "G", "H"]
+    all_links = report["links_added"] + report["links_removed"]
+    assert not any(label.startswith("dummy") for link in all_links for label in link)
+
+
+def test_compare_by_dbkey_streams_records(current, network):
+    records = list(current.compare(network, key="dbkey", stream=True, chunk_size=3))
+    kinds = [kind for kind, _ in records]
+    assert kinds == ["variance"] * 7 + ["added", "removed", "link_added", "link_removed", "link_removed"]
+    assert records[2][1] == ActivityVariance(102, 0, 10, -6, False, True)
+    assert ("added", 999) in records
+    assert ("link_added", (999, 107)) in records
+
+
+def test_identical_networks_have_no_changes(network, activities):
+    baseline = build_network(activities)
+    baseline.calculate()
+    report = network.compare(baseline, key="dbkey", changed_only=True)
+    assert report == {"variances": [], "added": [], "removed": [], "links_added": [], "links_removed": []}
+
+
+def test_compare_needs_calculated_networks(network, activities):
+    with pytest.raises(ValueError):
+        network.compare(build_network(activities))
+    with pytest.raises(ValueError):
+        network.compare(network, key="wbs")
+
+
+def test_variances_keep_integer_days(current, network):
+    variance = current.compare(network)["variances"][2]
+    assert [type(value) for value in variance[1:4]] == [int, int, int]
+    assert isinstance(variance.baseline_critical, bool)
+
+
+def test_streaming_validates_before_the_first_record(network, activities):
+    with pytest.raises(ValueError):
+        network.compare(network, key="wbs", stream=True)
+    with pytest.raises(ValueError):
+        network.compare(build_network(activities), stream=True)
+
+
+def test_mixed_key_types_are_rejected(network, activities):
+    mixed = build_network([dict(a, dbkey=str(a["dbkey"])) if a["label"] == "A" else a for a in activities])
+    mixed.calculate()
+    with pytest.raises(ValueError, match="mix types"):
+        network.compare(mixed, key="dbkey", stream=True)
+    assert network.compare(mixed)["variances"]
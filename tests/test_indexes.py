@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from cpm_calculator.cpm import Node, ProjectNetwork
+
+
+def test_ids_are_stable_in_add_order(network):
+    assert network.get_node_id("A") == 0
+    assert network.get_node_by_id(3).get_label() == "D"
+    network.add_node(Node("step", "Z", 1))
+    assert network.get_node_id("Z") == len(network.id_nodes) - 1
+    assert network.get_node_id("D") == 3
+
+
+def test_readding_a_label_keeps_its_id(network):
+    replacement = Node("step", "D", 9)
+    replacement.set_dbkey("new-d")
+    network.add_node(replacement)
+    assert network.get_node_id("D") == 3
+    assert network.get_node_by_id(3) is replacement
+    assert network.get_node_by_dbkey(103) is None
+    assert network.get_node_by_dbkey("new-d") is replacement
+
+
+def test_dbkey_lookups(network):
+    assert network.get_node_by_dbkey(103).get_label() == "D"
+    ids = network.get_ids(np.array([100, 103, 107]))
+    assert ids.tolist() == [0, 3, 7]
+    assert network.get_ids(["H", "A"], by="label").tolist() == [7, 0]
+    with pytest.raises(KeyError):
+        network.get_ids([999])
+
+
+def test_set_dbkey_updates_the_index(network):
+    a = network.get_node("A")
+    network.set_dbkey(a, "a")
+    assert network.get_node_by_dbkey(100) is None
+    assert network.get_node_by_dbkey("a") is a
+
+
+def test_get_values_reads_id_indexed_columns(network):
+    ids = network.get_ids([100, 103, 102])
+    values = network.get_values(ids)
+    assert values.tolist() == [[0, 3], [7, 12], [3, 11]]
+    assert network.get_values(ids, "float").tolist() == [0, 0, 6]
+    assert network.get_values([102], ("latest_start",), by="dbkey").shape == (1, 1)
+    column = network.get_snapshot().get_column("earliest_finish")
+    assert column[ids].tolist() == [3, 12, 5]
+    with pytest.raises(ValueError):
+        column[0] = 1
+    with pytest.raises(KeyError):
+        network.get_values(ids, "colour")
+
+
+def test_get_values_needs_a_calculation():
+    network = ProjectNetwork()
+    network.add_node(Node("start", "S", 1))
+    with pytest.raises(ValueError):
+        network.get_values([0])
+
+
+def test_set_durations_in_bulk(network):
+    network.set_durations(np.array([103, 101]), np.array([1, 1]))
+    network.calculate()
+    assert network.get_cp_duration() == 13
+    assert network.get_values(network.get_ids([103]), "duration").tolist() == [1]
+    with pytest.raises(ValueError):
+        network.set_durations([100, 101], [1])
@@ -0,0 +1,86 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from cpm_calculator.cli import build_network
+from cpm_calculator.outofcore import DiskNetwork, generate_network
+
+
+def check_passes(disk):
+    """
+    Check the results against the CPM definitions using whole-array numpy operations
+    """
+    es = np.load(disk._path("earliest_start"))
+    ef = np.load(disk._path("earliest_finish"))
+    ls = np.load(disk._path("latest_start"))
+    lf = np.load(disk._path("latest_finish"))
+    duration = np.asarray(disk.duration)
+    # one entry per link, in the positions the passes use
+    successors = np.repeat(np.arange(disk.node_count), np.diff(disk.pred_offsets))
+    predecessors = np.asarray(disk.pred_targets)
+    expected_es = np.zeros(disk.node_count, dtype=es.dtype)
+    np.maximum.at(expected_es, successors, ef[predecessors])
+    assert np.array_equal(es, expected_es)
+    assert np.array_equal(ef, es + duration)
+    cp_duration = ef.max()
+    expected_lf = np.full(disk.node_count, cp_duration, dtype=lf.dtype)
+    np.minimum.at(expected_lf, predecessors, ls[successors])
+    assert np.array_equal(lf, expected_lf)
+    assert np.array_equal(ls, lf - duration)
+    assert disk.get_cp_duration() == cp_duration
+
+
+def test_matches_in_memory_calculation(tmp_path):
+    rng = random.Random(3)
+    for trial in range(40):
+        count = rng.randint(2, 12)
+        labels = ["n{}".format(i) for i in rng.sample(range(count), count)]
+        network = build_network([
+            {"label": labels[i], "duration": rng.randint(0, 6),
+             "successors": [labels[j] for j in range(i + 1, count) if rng.random() < 0.3]}
+            for i in range(count)
+        ])
+        network.calculate()
+        disk = DiskNetwork.from_project_network(network, str(tmp_path / str(trial)))
+        disk.calculate(chunk_size=rng.randint(1, 5))
+        assert disk.get_cp_duration() == network.get_cp_duration()
+        assert set(disk.get_critical_path()) == set(network.get_critical_path())
+        ids = network.get_ids(list(network.get_nodes()), by="label")
+        for field in ("earliest_start", "latest_finish", "float"):
+            assert np.array_equal(disk.get_values(ids, field), network.get_values(ids, field))
+
+
+def test_unordered_ids_are_renumbered(tmp_path):
+    ordered = generate_network(str(tmp_path / "ordered"), 2000, span=50, seed=1)
+    ordered.calculate(chunk_size=128)
+    permutation = np.random.default_rng(2).permutation(2000)
+    new_id = np.empty(2000, dtype=np.int64)
+    new_id[permutation] = np.arange(2000)
+    successors = np.repeat(np.arange(2000), np.diff(ordered.pred_offsets))
+    shuffled = DiskNetwork.create(str(tmp_path / "shuffled"), np.asarray(ordered.duration)[permutation],
+                                  new_id[np.asarray(ordered.pred_targets)], new_id[successors])
+    shuffled.calculate(chunk_size=100)
+    check_passes(shuffled)
+    assert shuffled.get_cp_duration() == ordered.get_cp_duration()
+    assert sorted(new_id[ordered.get_critical_path()].tolist()) == sorted(shuffled.get_critical_path())
+
+
+def test_loops_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DiskNetwork.create(str(tmp_path), [1, 1, 1], [0, 1, 2], [1, 2, 1])
+
+
+def test_generated_network(tmp_path):
+    disk = generate_network(str(tmp_path), 100000, seed=4)
+    disk.calculate(chunk_size=4096)
+    check_passes(disk)
+    assert disk.get_critical_path()
+
+
+@pytest.mark.skipif(not os.environ.get("CPM_LARGE_TESTS"), reason="set CPM_LARGE_TESTS=1 to run")
+def test_generated_five_million_node_network(tmp_path):
+    disk = generate_network(str(tmp_path), 5000000, seed=5)
+    disk.calculate()
+    check_passes(disk)
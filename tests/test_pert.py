@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from cpm_calculator.cli import build_network
+from cpm_calculator.pert import estimate_finish, node_moments
+
+
+def estimated(activities, estimates):
+    network = build_network(activities)
+    for label, three_point in estimates.items():
+        network.get_node(label).set_estimates(*three_point)
+    return network
+
+
+def monte_carlo(network, samples=200000, seed=0):
+    """
+    Sample each duration from a normal distribution with its PERT mean and variance
+    """
+    rng = np.random.default_rng(seed)
+    finishes = {}
+    for label in network.topological_order():
+        node = network.get_node(label)
+        predecessors = node.get_predecessor_list()
+        start = np.max([finishes[p] for p in predecessors], axis=0) if predecessors else np.zeros(samples)
+        mean, variance = node_moments(node)
+        finishes[label] = start + rng.normal(mean, np.sqrt(variance), samples)
+    return finishes[network.get_finish_node().get_label()]
+
+
+def test_deterministic_network_matches_calculate(network):
+    estimate = estimate_finish(network)
+    assert (estimate.mean, estimate.variance) == (19, 0)
+    assert estimate.get_criticality("B") == 1.0
+    assert estimate.get_criticality("C") == 0.0
+    assert estimate.probability(19) == 1.0
+
+
+def test_independent_branches_are_not_correlated():
+    network = estimated([
+        {"label": "P1", "duration": 0, "successors": "Q1"},
+        {"label": "P2", "duration": 0, "successors": "Q2"},
+        {"label": "Q1", "duration": 2, "successors": "M"},
+        {"label": "Q2", "duration": 2, "successors": "M"},
+        {"label": "M", "duration": 0},
+    ], {"P1": (0, 10, 40), "P2": (0, 10, 40)})
+    estimate = estimate_finish(network)
+    sampled = monte_carlo(network)
+    assert estimate.mean == pytest.approx(sampled.mean(), abs=0.05)
+    assert estimate.get_std() == pytest.approx(sampled.std(), abs=0.05)
+    assert estimate.get_criticality("P1") == pytest.approx(0.5)
+
+
+def test_shared_activity_is_fully_correlated():
+    network = estimated([
+        {"label": "A", "duration": 0, "successors": "B,C"},
+        {"label": "B", "duration": 2, "successors": "D"},
+        {"label": "C", "duration": 3, "successors": "D"},
+        {"label": "D", "duration": 1},
+    ], {"A": (0, 10, 40)})
+    estimate = estimate_finish(network)
+    mean, variance = node_moments(network.get_node("A"))
+    assert estimate.mean == pytest.approx(mean + 4)
+    assert estimate.variance == pytest.approx(variance)
+    assert estimate.get_criticality("C") == 1.0
+    assert estimate.get_criticality("B") == 0.0
+
+
+def test_partly_shared_paths_against_monte_carlo():
+    network = estimated([
+        {"label": "A", "duration": 0, "successors": "B,C,E"},
+        {"label": "B", "duration": 0, "successors": "D"},
+        {"label": "C", "duration": 0, "successors": "D,F"},
+        {"label": "D", "duration": 0, "successors": "G"},
+        {"label": "E", "duration": 0, "successors": "F"},
+        {"label": "F", "duration": 0, "successors": "G"},
+        {"label": "G", "duration": 0},
+    ], {"A": (2, 5, 14), "B": (3, 6, 12), "C": (1, 5, 15), "D": (2, 4, 9),
+        "E": (4, 8, 10), "F": (1, 6, 13), "G": (1, 2, 3)})
+    estimate = estimate_finish(network)
+    sampled = monte_carlo(network)
+    assert estimate.mean == pytest.approx(sampled.mean(), rel=0.01)
+    assert estimate.get_std() == pytest.approx(sampled.std(), rel=0.03)
+
+
+def test_small_basis_keeps_total_variance(network):
+    for node in network.get_node_list():
+        if node.get_duration():
+            node.set_estimates(node.get_duration() * 0.5, node.get_duration(), node.get_duration() * 2)
+    full = estimate_finish(network)
+    truncated = estimate_finish(network, basis_size=1)
+    finish = truncated.finishes["dummy finish"]
+    assert len(finish.coefficients) <= 1
+    assert sum(c ** 2 for c in finish.coefficients.values()) + finish.remainder == pytest.approx(finish.variance)
+    assert truncated.mean == pytest.approx(full.mean, rel=0.05)
+
+
+SCRIPT = """
+from cpm_calculator.cli import build_network
+from cpm_calculator.pert import estimate_finish
+network = build_network([{"label": "P%d" % i, "duration": 0, "successors": "M"} for i in range(4)]
+                        + [{"label": "M", "duration": 1}])
+for i in range(4):
+    network.get_node("P%d" % i).set_estimates(i, 5 + i, 20 - i)
+estimate = estimate_finish(network)
+print(repr((estimate.mean, estimate.variance, sorted(estimate.criticality.items()))))
+"""
+
+
+def test_results_do_not_depend_on_hash_seed():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    outputs = set()
+    for seed in range(1, 6):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed), PYTHONPATH=root)
+        outputs.add(subprocess.check_output([sys.executable, "-c", SCRIPT], env=env, cwd=root))
+    assert len(outputs) == 1
+
+
+def test_invalid_estimates_rejected(network):
+    with pytest.raises(ValueError):
+        network.get_node("A").set_estimates(3, 2, 1)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from cpm_calculator import phasing
+from cpm_calculator.cli import build_network
+
+
+@pytest.fixture
+def costed(network):
+    for node in network.get_node_list():
+        node.set_quantity("cost", node.get_duration() * 100)
+    network.get_node("dummy finish").set_quantity("cost", 50)
+    return network
+
+
+def day_by_day(network, quantity, late=False):
+    totals = np.zeros(network.get_cp_duration() + 1)
+    for node in network.get_node_list():
+        value = node.get_quantity(quantity)
+        if not value:
+            continue
+        start = node.get_latest_start() if late else node.get_earliest_start()
+        days = max(node.get_duration(), 1)
+        for day in range(days):
+            totals[start + day] += value / days
+    return totals
+
+
+def test_daily_totals_match_day_by_day_loop(costed):
+    early, late = phasing.time_phase(costed, "cost", basis="both")
+    assert np.allclose(early, day_by_day(costed, "cost"))
+    assert np.allclose(late, day_by_day(costed, "cost", late=True))
+    assert early.sum() == pytest.approx(2400 + 50)
+
+
+def test_zero_duration_node_lands_on_its_start_day(costed):
+    early = phasing.time_phase(costed, "cost")
+    assert early[19] == pytest.approx(50)
+
+
+def test_weeks_are_seven_day_offsets(costed):
+    daily = phasing.time_phase(costed, "cost")
+    weekly = phasing.time_phase(costed, "cost", period="week")
+    assert len(weekly) == 3
+    assert weekly[0] == pytest.approx(daily[:7].sum())
+    assert weekly[2] == pytest.approx(daily[14:].sum())
+    assert len(phasing.time_phase(costed, "cost", period=5)) == 4
+
+
+def test_s_curve_is_cumulative(costed):
+    curve = phasing.s_curve(costed, "cost", period="week")
+    assert np.all(np.diff(curve) >= 0)
+    assert curve[-1] == pytest.approx(2450)
+
+
+def test_unknown_quantity_and_bad_arguments(network):
+    assert not phasing.time_phase(network, "hours").any()
+    with pytest.raises(ValueError):
+        phasing.time_phase(network, "cost", basis="middle")
+    with pytest.raises(ValueError):
+        phasing.time_phase(network, "cost", period="month")
+
+
+def test_reads_the_snapshot_not_live_nodes(costed):
+    expected = phasing.time_phase(costed, "cost", basis="both")
+    # simulate a calculation in progress: live nodes reset, snapshot untouched
+    costed._reset()
+    early, late = phasing.time_phase(costed, "cost", basis="both")
+    assert np.array_equal(early, expected[0])
+    assert np.array_equal(late, expected[1])
+
+
+def test_requires_a_calculation(activities):
+    with pytest.raises(ValueError):
+        phasing.time_phase(build_network(activities), "cost")
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from cpm_calculator.cli import build_network
+from cpm_calculator.cpm import Node
+
+
+def calculated(activities):
+    network = build_network(activities)
+    network.calculate()
+    return network
+
+
+def with_duration(activities, label, duration):
+    return [dict(a, duration=duration) if a["label"] == label else dict(a) for a in activities]
+
+
+def test_increase_of_non_critical_activity(network):
+    report = network.sensitivity(delta=8)
+    c = report["C"]
+    assert (c.float, c.iscritical) == (6, False)
+    assert c.increase == 2
+    assert c.decrease == 0
+    assert c.critical_threshold == 6
+    assert c.noncritical_threshold is None
+
+
+def test_critical_activity_changes_duration_one_for_one(network):
+    b = network.sensitivity(delta=2)["B"]
+    assert b.iscritical
+    assert (b.increase, b.decrease, b.critical_threshold) == (2, -2, 0)
+    # every other path is 6 days shorter, more than B's 4 days, so B stays critical
+    assert b.noncritical_threshold is None
+
+
+def test_noncritical_threshold_and_capped_decrease():
+    network = calculated([
+        {"label": "X", "duration": 5, "successors": "Z"},
+        {"label": "Y", "duration": 3, "successors": "Z"},
+        {"label": "Z", "duration": 1},
+    ])
+    x = network.sensitivity(delta=4)["X"]
+    assert x.noncritical_threshold == 2
+    assert x.decrease == -2
+    assert x.increase == 4
+    shortened = calculated([
+        {"label": "X", "duration": 2, "successors": "Z"},
+        {"label": "Y", "duration": 3, "successors": "Z"},
+        {"label": "Z", "duration": 1},
+    ])
+    assert not shortened.get_node("X").is_critical()
+
+
+def test_matches_recalculation_on_random_networks():
+    rng = random.Random(7)
+    for _ in range(60):
+        count = rng.randint(2, 8)
+        activities = [
+            {"label": str(i), "duration": rng.randint(0, 6),
+             "successors": [str(j) for j in range(i + 1, count) if rng.random() < 0.35]}
+            for i in range(count)
+        ]
+        network = calculated(activities)
+        delta = rng.randint(1, 4)
+        for label, result in network.sensitivity(delta).items():
+            if label.startswith("dummy"):
+                continue
+            duration = result.duration
+            grown = calculated(with_duration(activities, label, duration + delta))
+            shrunk = calculated(with_duration(activities, label, max(duration - delta, 0)))
+            assert grown.get_cp_duration() - network.get_cp_duration() == result.increase
+            assert shrunk.get_cp_duration() - network.get_cp_duration() == result.decrease
+
+
+def test_zero_duration_activity_with_float_is_not_critical():
+    # the backward pass used to treat a latest finish of 0 as unset, marking this critical
+    network = calculated([
+        {"label": "M", "duration": 0, "successors": "N,Q"},
+        {"label": "N", "duration": 0, "successors": "Q"},
+        {"label": "P", "duration": 5, "successors": "Q"},
+        {"label": "Q", "duration": 1},
+    ])
+    m = network.get_node("M")
+    assert (m.get_latest_finish(), m.get_float(), m.is_critical()) == (5, 5, False)
+    assert network.get_critical_path() == ["dummy start", "P", "Q", "dummy finish"]
+    start = network.get_node("dummy start")
+    assert (start.get_latest_finish(), start.get_float()) == (0, 0)
+
+
+def test_float_and_critical_flags_consistent(network):
+    for node in network.get_node_list():
+        assert node.get_float() == node.get_latest_start() - node.get_earliest_start()
+        assert node.get_float() >= 0
+        assert node.is_critical() == (node.get_float() == 0)
+
+
+def test_recalculation_after_shortening(network):
+    network.get_node("D").set_duration(1)
+    network.calculate()
+    assert network.get_cp_duration() == 15
+    assert not network.get_node("E").is_critical()
+    network.get_node("B").set_duration(1)
+    network.calculate()
+    assert network.get_cp_duration() == 13
+    assert network.get_node("E").is_critical()
+
+
+def test_requires_a_current_calculation(activities, network):
+    with pytest.raises(ValueError):
+        build_network(activities).sensitivity()
+    network.link(network.get_node("A"), network.add_node(Node("step", "I", 2)))
+    network.link(network.get_node("I"), network.get_node("H"))
+    with pytest.raises(ValueError):
+        network.sensitivity()
+    network.calculate()
+    assert network.sensitivity()["I"].critical_threshold == 11
+
+
+def test_reads_the_snapshot_not_live_nodes(network):
+    expected = network.sensitivity()
+    # simulate a calculation in progress: live nodes reset, snapshot untouched
+    network._reset()
+    assert network.sensitivity() == expected
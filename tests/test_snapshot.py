@@ -0,0 +1,79 @@
+import threading
+from datetime import date
+
+import pytest
+
+from cpm_calculator.cpm import NetworkSnapshot
+
+PATH_19 = ["dummy start", "A", "B", "D", "G", "H", "dummy finish"]
+PATH_31 = ["dummy start", "A", "C", "E", "G", "H", "dummy finish"]
+
+
+def test_calculate_publishes_snapshot(network):
+    snapshot = network.get_snapshot()
+    assert isinstance(snapshot, NetworkSnapshot)
+    assert snapshot.get_critical_path() == PATH_19
+    assert snapshot.get_cp_duration() == 19
+    c = snapshot.get_node("C")
+    assert (c.earliest_start, c.latest_finish, c.float, c.iscritical) == (3, 11, 6, False)
+
+
+def test_snapshot_is_immutable(network):
+    snapshot = network.get_snapshot()
+    with pytest.raises(AttributeError):
+        snapshot._cp_duration = 1
+    with pytest.raises(TypeError):
+        snapshot.get_nodes()["A"] = None
+
+
+def test_recalculation_replaces_snapshot(network):
+    old = network.get_snapshot()
+    network.get_node("C").set_duration(20)
+    network.calculate()
+    assert network.get_critical_path() == PATH_31
+    assert network.get_cp_duration() == 31
+    assert old.get_cp_duration() == 19
+
+
+def test_getters_read_the_snapshot_not_live_nodes(network):
+    # simulate a calculation in progress: live nodes reset, snapshot untouched
+    network._reset()
+    assert network.get_critical_path() == PATH_19
+    assert network.get_cp_duration() == 19
+
+
+def test_dates_cleared_until_updated(network):
+    network.update_dates_with_earliest_start(date(2026, 1, 1))
+    assert network.get_snapshot().get_node("H").latest_finish_date == date(2026, 1, 20)
+    network.calculate()
+    assert network.get_snapshot().get_node("H").latest_finish_date is None
+
+
+def test_concurrent_readers_see_consistent_results(network):
+    valid = {(tuple(PATH_19), 19), (tuple(PATH_31), 31)}
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        for i in range(200):
+            network.get_node("C").set_duration(20 if i % 2 else 2)
+            network.calculate()
+        stop.set()
+
+    def reader():
+        while not stop.is_set():
+            snapshot = network.get_snapshot()
+            result = (tuple(snapshot.get_critical_path()), snapshot.get_cp_duration())
+            if result not in valid:
+                errors.append(result)
+            if network.get_cp_duration() not in (19, 31):
+                errors.append(network.get_cp_duration())
+            if tuple(network.get_critical_path()) not in (tuple(PATH_19), tuple(PATH_31)):
+                errors.append(network.get_critical_path())
+
+    threads = [threading.Thread(target=reader) for _ in range(4)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
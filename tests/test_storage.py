@@ -0,0 +1,131 @@
+from datetime import date, datetime
+
+import pytest
+
+from cpm_calculator.cpm import Node, ProjectNetwork, SummaryNode
+from cpm_calculator.storage import SQLiteStore
+
+
+@pytest.fixture
+def store():
+    store = SQLiteStore(":memory:")
+    yield store
+    store.close()
+
+
+def count_rows(store, table):
+    return store.connection.execute("SELECT COUNT(*) FROM {}".format(table)).fetchone()[0]
+
+
+def test_save_then_resave_writes_nothing(store, network):
+    assert store.save(network) == 8 + 9
+    assert store.save(network) == 0
+    assert count_rows(store, "nodes") == 8
+    assert count_rows(store, "links") == 9
+
+
+def test_load_round_trip(store, network):
+    network.get_node("A").set_quantity("cost", 5)
+    store.save(network)
+    loaded = store.load()
+    assert store.save(loaded) == 0
+    a = loaded.get_node_by_dbkey(100)
+    assert a.get_label() == "A"
+    assert a.get_quantities() == {"cost": 5}
+    assert sorted(a.get_successor_list()) == ["B", "C"]
+    loaded.set_dummy_start_node()
+    loaded.set_dummy_finish_node()
+    loaded.calculate()
+    assert loaded.get_cp_duration() == 19
+
+
+def test_only_changed_nodes_are_written(store, network):
+    store.save(network)
+    network.set_durations([103], [1])
+    network.calculate()
+    written = []
+    store.connection.set_trace_callback(written.append)
+    # shortening D changes the results of some nodes, but not A's
+    changed = store.save(network)
+    store.connection.set_trace_callback(None)
+    inserts = [sql for sql in written if sql.startswith("INSERT OR REPLACE")]
+    assert len(inserts) == changed
+    assert 0 < changed < 8
+    assert any("103" in sql for sql in inserts)
+    assert not any(sql.startswith("INSERT OR REPLACE") and "(100," in sql for sql in written)
+
+
+def test_link_add_and_remove(store, network):
+    store.save(network)
+    e, h = network.get_node("E"), network.get_node("H")
+    network.link(e, h)
+    assert store.save(network) == 1
+    c, f = network.get_node("C"), network.get_node("F")
+    c.successors.discard("F")
+    f.predecessors.discard("C")
+    assert store.save(network) == 1
+    links = set(store.connection.execute("SELECT predecessor, successor FROM links"))
+    assert (104, 107) in links
+    assert (102, 105) not in links
+
+
+def test_removed_node_is_deleted(store, network):
+    store.save(network)
+    del network.nodes["F"]
+    network.get_node("C").successors.discard("F")
+    network.get_node("H").predecessors.discard("F")
+    assert store.save(network) == 3
+    assert count_rows(store, "nodes") == 7
+
+
+def test_dates_round_trip(store, network):
+    network.update_dates_with_earliest_start(date(2026, 1, 1))
+    store.save(network)
+    loaded = store.load()
+    assert loaded.get_node("H").get_latest_finish_date() == date(2026, 1, 20)
+    network.update_dates_with_earliest_start(datetime(2026, 1, 1, 8, 30))
+    store.save(network)
+    loaded = store.load()
+    assert loaded.get_node("H").get_latest_finish_date() == datetime(2026, 1, 20, 8, 30)
+
+
+def test_node_without_dbkey_is_rejected(store, network):
+    network.add_node(Node("step", "Z", 1))
+    with pytest.raises(ValueError):
+        store.save(network)
+
+
+def test_reopened_store_diffs_against_the_database(tmp_path, network):
+    path = str(tmp_path / "schedule.db")
+    store = SQLiteStore(path)
+    store.save(network)
+    store.close()
+
+    # an unchanged network writes nothing through a fresh store
+    store = SQLiteStore(path)
+    assert store.save(network) == 0
+    store.close()
+
+    # removed nodes and links are deleted through a fresh store
+    del network.nodes["F"]
+    network.get_node("C").successors.discard("F")
+    network.get_node("H").predecessors.discard("F")
+    store = SQLiteStore(path)
+    assert store.save(network) == 3
+    store.close()
+
+    store = SQLiteStore(path)
+    loaded = store.load()
+    store.close()
+    assert loaded.get_node("F") is None
+    assert "F" not in loaded.get_node("C").get_successor_list()
+    assert len(loaded.get_nodes()) == 7
+
+
+def test_summary_node_is_rejected(store, network):
+    summary = SummaryNode("fragment", ProjectNetwork())
+    summary.set_dbkey(500)
+    network.add_node(summary)
+    with pytest.raises(ValueError, match="fragment"):
+        store.save(network)
+    assert count_rows(store, "nodes") == 0
@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+
+from cpm_calculator.cli import build_network
+from cpm_calculator.cpm import Node, ProjectNetwork, SummaryNode
+
+
+@pytest.fixture
+def fragment():
+    # a two step commissioning fragment: 3 + 4 = 7 days
+    return build_network([
+        {"label": "test", "duration": 3, "successors": "handover"},
+        {"label": "handover", "duration": 4},
+    ])
+
+
+def outer_network(fragment, copies=3):
+    network = ProjectNetwork()
+    previous = network.add_node(Node("step", "design", 2))
+    for i in range(copies):
+        summary = network.add_node(SummaryNode("commission {}".format(i), fragment))
+        network.link(previous, summary)
+        previous = summary
+    network.set_dummy_start_node()
+    network.set_dummy_finish_node()
+    return network
+
+
+def test_summary_duration_is_subnetwork_cp_duration(fragment):
+    network = outer_network(fragment)
+    network.calculate()
+    assert network.get_cp_duration() == 2 + 3 * 7
+    assert network.get_node("commission 1").get_earliest_start() == 9
+
+
+def test_shared_fragment_is_calculated_once(fragment, monkeypatch):
+    calls = []
+    calculate = fragment.calculate
+    monkeypatch.setattr(fragment, "calculate", lambda: calls.append(1) or calculate())
+    network = outer_network(fragment)
+    network.calculate()
+    network.calculate()
+    assert len(calls) == 1
+    fragment.set_durations(["handover"], [1], by="label")
+    network.calculate()
+    assert len(calls) == 2
+    assert network.get_cp_duration() == 2 + 3 * 4
+
+
+def test_duration_edits_invalidate_the_summary(fragment):
+    network = outer_network(fragment, copies=1)
+    network.calculate()
+    fragment.get_node("test").set_duration(10)
+    assert fragment.is_modified()
+    network.calculate()
+    assert network.get_cp_duration() == 2 + 14
+    # assigning the attribute directly is recorded too
+    fragment.get_node("test").duration = 1
+    assert network.is_modified()
+    network.calculate()
+    assert network.get_cp_duration() == 2 + 5
+
+
+def test_direct_link_edits_need_mark_modified(fragment):
+    network = outer_network(fragment, copies=1)
+    network.calculate()
+    test, handover = fragment.get_node("test"), fragment.get_node("handover")
+    test.successors.discard("handover")
+    handover.predecessors.discard("test")
+    test.add_successors("dummy finish")
+    handover.add_predecessors("dummy start")
+    fragment.get_node("dummy start").add_successors("handover")
+    fragment.get_node("dummy finish").add_predecessors("test")
+    assert not fragment.is_modified()
+    fragment.mark_modified()
+    network.calculate()
+    assert network.get_cp_duration() == 2 + 4
+
+
+def test_updating_dates_does_not_hide_changes(fragment):
+    network = outer_network(fragment, copies=1)
+    network.calculate()
+    fragment.set_durations(["test"], [10], by="label")
+    fragment.update_dates_with_earliest_start(date(2026, 1, 1))
+    assert fragment.is_modified()
+    network.calculate()
+    assert network.get_node("commission 0").get_duration() == 14
+    assert network.get_cp_duration() == 16
+    assert not fragment.is_modified()
+
+
+def test_nested_fragments(fragment):
+    middle = outer_network(fragment, copies=2)
+    top = ProjectNetwork()
+    top.add_node(SummaryNode("programme", middle, node_type="start"))
+    top.set_dummy_finish_node()
+    top.calculate()
+    assert top.get_cp_duration() == 16
+    fragment.set_durations(["test"], [1], by="label")
+    assert top.is_modified()
+    top.calculate()
+    assert top.get_cp_duration() == 2 + 2 * 5
+
+
+def test_summary_duration_cannot_be_set(fragment):
+    network = outer_network(fragment, copies=1)
+    with pytest.raises(ValueError):
+        network.set_durations(["commission 0"], [3], by="label")